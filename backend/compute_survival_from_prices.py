@@ -13,24 +13,37 @@ Env penting:
   SAMPLE_INTERVAL_SEC: interval sampling yang diasumsikan (default 600)
   POOL_TYPE         : "v2" / "v3" / lainnya (untuk meta)
   AERODROME_PAIR_ADDRESS: optional, untuk meta pair_address (fallback ke PAIR_LABEL)
+  PAIR_LABELS       : optional; daftar pair dipisah koma untuk batch run. Pair diproses
+                      paralel (thread pool di atas SESSION) sehingga wall time ~max
+                      latency satu pair, bukan jumlah semuanya.
 """
 
 import os
 import time
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 import numpy as np
 import pandas as pd
-import requests
 
+from http_session import SESSION, cached_json, json_loads, post_json
 from survival_km import compute_ticks, generate_recommendation
 
+# pyarrow opsional: konversi DataFrame -> list record di C (NaN jadi null native).
+try:
+    import pyarrow as pa
+
+    HAS_PYARROW = True
+except ImportError:  # pragma: no cover - tergantung environment
+    HAS_PYARROW = False
+
 WORKER_BASE_URL = os.getenv("WORKER_BASE_URL", "").rstrip("/")
 PAIR_LABEL = os.getenv("PAIR_LABEL", "").strip()
 LOOKBACK_HOURS = int(os.getenv("LOOKBACK_HOURS", "48"))
 INTERVAL_SEC = int(os.getenv("SAMPLE_INTERVAL_SEC", "600"))
 POOL_TYPE = os.getenv("POOL_TYPE", "v2").strip() or "v2"
 PAIR_ADDRESS = os.getenv("AERODROME_PAIR_ADDRESS", "").strip().lower()
+PAIR_LABELS = [p.strip() for p in os.getenv("PAIR_LABELS", "").split(",") if p.strip()]
 
 
 def require_worker_base() -> str:
@@ -56,15 +69,26 @@ def meta_payload(pair_label: str) -> Dict[str, str]:
     }
 
 
-def fetch_prices_from_worker(pair_label: str, lookback_hours: int) -> pd.DataFrame:
-    base_url = require_worker_base()
-    end_ms = int(time.time() * 1000)
-    start_ms = end_ms - lookback_hours * 3600 * 1000
+@cached_json(ttl=max(INTERVAL_SEC // 2, 1))
+def _fetch_prices_json(base_url: str, pair_label: str, start_ms: int, end_ms: int) -> Dict:
     params = {"pair": pair_label, "start_ts": start_ms, "end_ts": end_ms}
-    resp = requests.get(f"{base_url}/prices", params=params, timeout=20)
+    resp = SESSION.get(f"{base_url}/prices", params=params, timeout=20)
     if not resp.ok:
         raise RuntimeError(f"Gagal fetch harga dari Worker: {resp.status_code} {resp.text}")
-    payload = resp.json()
+    return json_loads(resp.content)
+
+
+def fetch_prices_from_worker(
+    pair_label: str, lookback_hours: int, end_ms: Optional[int] = None
+) -> pd.DataFrame:
+    base_url = require_worker_base()
+    # Bucket end_ts ke kelipatan TTL supaya run berulang dalam TTL memukul cache disk.
+    ttl_ms = max(INTERVAL_SEC // 2, 1) * 1000
+    if end_ms is None:
+        end_ms = int(time.time() * 1000)
+    end_ms = end_ms // ttl_ms * ttl_ms
+    start_ms = end_ms - lookback_hours * 3600 * 1000
+    payload = _fetch_prices_json(base_url, pair_label, start_ms, end_ms)
     rows: List[Dict] = payload.get("data", [])
     if not rows:
         raise RuntimeError("Tidak ada data harga dikembalikan Worker.")
@@ -72,10 +96,30 @@ def fetch_prices_from_worker(pair_label: str, lookback_hours: int) -> pd.DataFra
     if "timestamp" in df.columns:
         df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
     elif "ts" in df.columns:
-        df["timestamp"] = pd.to_datetime(df["ts"], unit="ms", utc=True, errors="coerce")
-    df["price"] = pd.to_numeric(df["price"], errors="coerce")
-    df = df.dropna(subset=["timestamp", "price"])
-    df = df.sort_values("timestamp").reset_index(drop=True)
+        # ts numerik (epoch ms): bangun datetime64 langsung dari int64, tanpa
+        # melewati parser umum pd.to_datetime per elemen.
+        ts_num = pd.to_numeric(df["ts"], errors="coerce").to_numpy(dtype=np.float64)
+        ts64 = np.full(ts_num.shape, np.datetime64("NaT", "ms"))
+        finite = np.isfinite(ts_num)
+        ts64[finite] = ts_num[finite].astype(np.int64).view("datetime64[ms]")
+        df["timestamp"] = pd.to_datetime(ts64, utc=True)
+    # Dtype sempit: float32 cukup untuk presisi harga LP dan setengah memori;
+    # pair adalah string low-cardinality -> category.
+    df["price"] = pd.to_numeric(df["price"], errors="coerce", downcast="float")
+    if "block" in df.columns:
+        df["block"] = pd.to_numeric(df["block"], errors="coerce", downcast="integer")
+    if "pair" in df.columns:
+        df["pair"] = df["pair"].astype("category")
+    # Satu mask boolean menggantikan dropna (tanpa copy bila semua baris valid),
+    # dan reset_index menumpang di sort via ignore_index.
+    valid = (df["timestamp"].notna() & df["price"].notna()).to_numpy()
+    if not valid.all():
+        df = df[valid]
+    # Worker mengembalikan baris ORDER BY ts; sort O(n log n) hanya jika perlu.
+    if not df["timestamp"].is_monotonic_increasing:
+        df = df.sort_values("timestamp", ignore_index=True)
+    else:
+        df = df.reset_index(drop=True)
     if df.empty:
         raise RuntimeError("Data harga kosong setelah parsing.")
     return df
@@ -84,68 +128,75 @@ def fetch_prices_from_worker(pair_label: str, lookback_hours: int) -> pd.DataFra
 def serialize_prices_iso(df: pd.DataFrame) -> List[Dict]:
     # Drop/clean non-finite prices before serialization.
     df_clean = df.replace([np.inf, -np.inf], np.nan).dropna(subset=["price"])
-    records: List[Dict] = []
-    for row in df_clean.to_dict(orient="records"):
-        ts = row.get("timestamp")
-        ts_str = ts.isoformat() if hasattr(ts, "isoformat") else str(ts)
-        price_val = row.get("price", 0)
-        if price_val is None or not np.isfinite(price_val):
-            continue
-        rec: Dict = {"timestamp": ts_str, "price": float(price_val)}
-        blk = row.get("block")
-        if blk is not None and not (isinstance(blk, float) and pd.isna(blk)):
-            try:
+    if df_clean.empty:
+        return []
+    # Vectorized extraction: one C-level pass per column instead of per-row dicts.
+    ts_arr = df_clean["timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%S%z").to_numpy()
+    price_arr = df_clean["price"].to_numpy(dtype=np.float64)
+    records: List[Dict] = [
+        {"timestamp": ts, "price": float(price)} for ts, price in zip(ts_arr, price_arr)
+    ]
+    if "block" in df_clean.columns:
+        blk_arr = pd.to_numeric(df_clean["block"], errors="coerce").to_numpy(dtype=np.float64)
+        for rec, blk in zip(records, blk_arr):
+            if np.isfinite(blk):
                 rec["block"] = int(blk)
-            except Exception:  # noqa: BLE001
-                pass
-        records.append(rec)
     return records
 
 
 def dataframe_to_records(df: pd.DataFrame) -> List[Dict]:
     clean = df.replace([np.inf, -np.inf], np.nan)
-    # Drop rows that still have NaN in critical numeric fields.
-    clean = clean.dropna(subset=["km_surv", "km_ci_low", "km_ci_high", "price_from", "price_to", "percent_range_total"])
-    # Replace NaN values with None (JSON null) for all fields
-    clean = clean.where(pd.notnull(clean), None)
-    # Convert to records and ensure all numeric values are finite
-    records = []
-    for row in clean.to_dict(orient="records"):
-        cleaned_row = {}
-        for key, value in row.items():
-            if isinstance(value, (int, float)):
-                if np.isnan(value) or np.isinf(value):
-                    cleaned_row[key] = None
-                else:
-                    cleaned_row[key] = value
-            else:
-                cleaned_row[key] = value
-        records.append(cleaned_row)
-    return records
-
-
-def push_survival_to_worker(pair_label: str, lookback_hours: int, interval_sec: int, payload: Dict) -> None:
+    # Drop rows that still have NaN in structural numeric fields. Kolom km_*
+    # sengaja TIDAK ikut: baris yang ditolak karena jumlah sampel membawa
+    # km_surv NaN by design dan harus tetap tampil downstream (sebagai null).
+    clean = clean.dropna(subset=["price_from", "price_to", "percent_range_total"])
+    if clean.empty:
+        return []
+    if HAS_PYARROW:
+        try:
+            # Arrow memetakan NaN -> null sekali jalan di C; to_pylist sudah None.
+            return pa.Table.from_pandas(clean, preserve_index=False).to_pylist()
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+    # Column-wise extraction (native Python scalars), substituting None (JSON null)
+    # only in columns that actually contain NaN.
+    columns = list(clean.columns)
+    data = clean.to_dict(orient="list")
+    for col in clean.columns[clean.isna().any()]:
+        data[col] = [None if pd.isna(value) else value for value in data[col]]
+    return [dict(zip(columns, values)) for values in zip(*(data[col] for col in columns))]
+
+
+def push_survival_to_worker(
+    pair_label: str,
+    lookback_hours: int,
+    interval_sec: int,
+    payload: Dict,
+    generated_at: Optional[int] = None,
+) -> None:
     base_url = require_worker_base()
     body = {
         "pair": pair_label,
         "lookback": lookback_hours,
         "interval_sec": interval_sec,
-        "generated_at": int(time.time() * 1000),
+        "generated_at": generated_at if generated_at is not None else int(time.time() * 1000),
         "payload": payload,
     }
-    resp = requests.post(f"{base_url}/ingest_survival", json=body, timeout=20)
+    resp = post_json(f"{base_url}/ingest_survival", body, timeout=20)
     if not resp.ok:
         raise RuntimeError(f"Gagal push survival ke Worker: {resp.status_code} {resp.text}")
 
 
-def main() -> None:
-    start_ts = time.time()
-    pair_label = effective_pair_label()
+def process_pair(pair_label: str) -> None:
+    """Jalankan pipeline fetch -> survival -> push untuk satu pair."""
+    # Satu stempel waktu untuk seluruh run: window fetch dan generated_at konsisten
+    # (memudahkan dedup downstream) dan tidak perlu syscall time berulang.
+    now_ms = int(time.time() * 1000)
     print(f"Fetching prices from Worker for pair={pair_label}, lookback={LOOKBACK_HOURS}h...")
-    price_df = fetch_prices_from_worker(pair_label, LOOKBACK_HOURS)
-    print(f"Fetched {len(price_df)} price rows.")
+    price_df = fetch_prices_from_worker(pair_label, LOOKBACK_HOURS, end_ms=now_ms)
+    print(f"[{pair_label}] Fetched {len(price_df)} price rows.")
 
-    print("Computing ticks and survival...")
+    print(f"[{pair_label}] Computing ticks and survival...")
     df_ticks = compute_ticks(price_df)
     recs_df = generate_recommendation(df_ticks)
 
@@ -156,9 +207,23 @@ def main() -> None:
         "recommendations": recommendations,
         "prices": prices_payload,
     }
-    push_survival_to_worker(pair_label, LOOKBACK_HOURS, INTERVAL_SEC, survival_payload)
+    push_survival_to_worker(
+        pair_label, LOOKBACK_HOURS, INTERVAL_SEC, survival_payload, generated_at=now_ms
+    )
+
+
+def main() -> None:
+    start_ts = time.time()
+    pairs = PAIR_LABELS if PAIR_LABELS else [effective_pair_label()]
+    if len(pairs) == 1:
+        process_pair(pairs[0])
+    else:
+        # Batch mode: overlap I/O antar pair (SESSION sudah punya connection pool).
+        with ThreadPoolExecutor(max_workers=min(4, len(pairs))) as pool:
+            for future in [pool.submit(process_pair, p) for p in pairs]:
+                future.result()
     elapsed = time.time() - start_ts
-    print(f"Done. Survival payload pushed to Worker. Elapsed: {elapsed:.2f} sec.")
+    print(f"Done. Survival payload pushed to Worker for {len(pairs)} pair(s). Elapsed: {elapsed:.2f} sec.")
 
 
 if __name__ == "__main__":
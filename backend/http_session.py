@@ -0,0 +1,175 @@
+"""
+Shared requests.Session dengan connection pooling + keep-alive untuk semua
+panggilan HTTP ke Worker/RPC/API eksternal.
+
+Tanpa session, tiap requests.get/post membuka TCP+TLS baru (~2 RTT per call).
+Satu session module-level dipakai bersama oleh script ingest/compute sehingga
+koneksi ke host yang sama di-reuse.
+"""
+
+import functools
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson opsional: encoder C yang 3-10x lebih cepat dari json stdlib dan bisa
+# men-serialize numpy scalar/array langsung. Fallback ke stdlib jika tidak ada.
+try:
+    import orjson
+
+    def _dumps(body) -> bytes:
+        return orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    json_loads = orjson.loads
+
+except ImportError:  # pragma: no cover - tergantung environment
+    import json
+
+    def _dumps(body) -> bytes:
+        return json.dumps(body).encode("utf-8")
+
+    json_loads = json.loads
+
+# Cache respons JSON di disk (time-bucketed) untuk memotong round-trip jaringan
+# saat script dijalankan berulang dalam interval pendek (debug loop / multi-pair).
+CACHE_DIR = Path(tempfile.gettempdir()) / "lp-cache"
+
+
+def cached_json(ttl: float) -> Callable:
+    """Decorator: cache hasil JSON-serializable func di disk selama `ttl` detik.
+
+    Key = blake2b dari (module, qualname, args, kwargs); isi disimpan gzip.
+    Kegagalan baca/tulis cache tidak pernah menggagalkan panggilan aslinya.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key_src = repr((func.__module__, func.__qualname__, args, sorted(kwargs.items())))
+            key = hashlib.blake2b(key_src.encode("utf-8"), digest_size=16).hexdigest()
+            path = CACHE_DIR / f"{key}.json.gz"
+            try:
+                if path.exists() and time.time() - path.stat().st_mtime < ttl:
+                    with gzip.open(path, "rb") as fh:
+                        return json_loads(fh.read())
+            except (OSError, ValueError):
+                pass
+            result = func(*args, **kwargs)
+            try:
+                CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(".tmp")
+                with gzip.open(tmp_path, "wb") as fh:
+                    fh.write(_dumps(result))
+                tmp_path.replace(path)
+            except OSError:
+                pass
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def build_session(
+    pool_connections: int = 4,
+    pool_maxsize: int = 8,
+    retries: Optional[Retry] = None,
+) -> requests.Session:
+    """Buat session dengan pool + retry untuk error transien (502/503/504)."""
+    session = requests.Session()
+    if retries is None:
+        retries = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=["GET", "POST"],
+        )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retries,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    session.headers["User-Agent"] = "lp-kaplan-meir/1.0"
+    return session
+
+
+# Session tunggal yang dipakai lintas script (import: from http_session import SESSION).
+SESSION = build_session()
+
+
+# Opt-in: kompres body POST besar (append_prices / ingest_survival) dengan gzip.
+# Default mati karena Worker harus mendukung Content-Encoding: gzip di sisi ingest.
+GZIP_ENABLED = os.getenv("WORKER_GZIP", "false").lower() == "true"
+# Body kecil tidak perlu dikompres; overhead gzip > penghematan bandwidth.
+GZIP_MIN_BYTES = 1024
+
+
+def get_json(url: str, params: Optional[Dict] = None, timeout: int = 20):
+    """GET lalu decode body JSON via orjson (bila ada) langsung dari bytes.
+
+    orjson.loads pada resp.content melewati deteksi encoding + decoder stdlib
+    di resp.json(), yang terasa pada body besar seperti window harga 48 jam.
+    """
+    resp = SESSION.get(url, params=params, timeout=timeout)
+    resp.raise_for_status()
+    return json_loads(resp.content)
+
+
+def post_json(
+    url: str, body: Dict, timeout: int = 20, gzip_body: Optional[bool] = None
+) -> requests.Response:
+    """POST body JSON lewat SESSION, encode sekali via orjson bila tersedia."""
+    data = _dumps(body)
+    headers = {"Content-Type": "application/json"}
+    use_gzip = GZIP_ENABLED if gzip_body is None else gzip_body
+    if use_gzip and len(data) >= GZIP_MIN_BYTES:
+        data = gzip.compress(data, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return SESSION.post(url, data=data, headers=headers, timeout=timeout)
+
+
+# Batas baris per POST append; payload raksasa dipecah dan dikirim pipelined.
+APPEND_CHUNK_SIZE = int(os.getenv("APPEND_CHUNK_SIZE", "1000"))
+
+
+def post_rows_chunked(
+    url: str,
+    pair: str,
+    rows: List[Dict],
+    timeout: int = 30,
+    chunk_size: Optional[int] = None,
+    max_workers: int = 4,
+) -> None:
+    """POST rows ke endpoint append dalam chunk.
+
+    Chunk dikirim paralel lewat SESSION pool (aman karena append_prices di Worker
+    adalah UPSERT per (pair, ts) sehingga urutan antar chunk tidak berpengaruh).
+    Raise pada response non-2xx chunk mana pun.
+    """
+    if chunk_size is None:
+        chunk_size = APPEND_CHUNK_SIZE
+    chunks = [rows[i : i + chunk_size] for i in range(0, len(rows), chunk_size)]
+
+    def send(chunk: List[Dict]) -> None:
+        resp = post_json(url, {"pair": pair, "rows": chunk}, timeout=timeout)
+        resp.raise_for_status()
+
+    if len(chunks) <= 1:
+        for chunk in chunks:
+            send(chunk)
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        for future in [pool.submit(send, chunk) for chunk in chunks]:
+            future.result()
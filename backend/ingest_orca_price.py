@@ -14,19 +14,20 @@ Field harga diambil dari API Orca: jika tersedia `price`, gunakan itu; jika tida
 dari sqrtPriceX64 dan desimal token (tokenA/tokenB).
 """
 
-import math
 import os
 import sys
 import time
 from typing import Dict, List, Optional
 
-import requests
+from http_session import cached_json, get_json, post_json
 
 WORKER_BASE_URL = os.getenv("WORKER_BASE_URL", "").rstrip("/")
 WORKER_INGEST_URL = os.getenv("WORKER_INGEST_URL", "").rstrip("/")
 PAIR_LABEL = os.getenv("PAIR_LABEL", "").strip()
 ORCA_WHIRLPOOL_ADDRESS = os.getenv("ORCA_WHIRLPOOL_ADDRESS", "").strip()
 ORCA_API_URL = os.getenv("ORCA_API_URL", "https://api.mainnet.orca.so/v1/whirlpool/list").strip()
+# TTL cache disk untuk list whirlpool (jarang berubah dalam satu polling interval).
+ORCA_CACHE_TTL_SEC = float(os.getenv("ORCA_CACHE_TTL_SEC", "60"))
 
 
 def worker_base_url() -> str:
@@ -37,10 +38,9 @@ def worker_base_url() -> str:
     raise RuntimeError("Set WORKER_BASE_URL atau WORKER_INGEST_URL terlebih dahulu.")
 
 
-def fetch_whirlpool_entry(address: str) -> Dict:
-    resp = requests.get(ORCA_API_URL, timeout=20)
-    resp.raise_for_status()
-    data = resp.json()
+@cached_json(ttl=ORCA_CACHE_TTL_SEC)
+def _fetch_pool_list() -> List[Dict]:
+    data = get_json(ORCA_API_URL, timeout=20)
     pools = None
     if isinstance(data, dict):
         pools = data.get("whirlpools") or data.get("data") or data.get("items")
@@ -48,16 +48,74 @@ def fetch_whirlpool_entry(address: str) -> Dict:
         pools = data
     if not isinstance(pools, list):
         raise RuntimeError("Response Orca tidak berisi list whirlpools.")
-    address_low = address.lower()
+    return pools
+
+
+def build_whirlpool_index(pools: List[Dict]) -> Dict[str, Dict]:
+    """Index address -> entry sekali jalan, supaya lookup O(1) dan bukan scan O(N)."""
+    index: Dict[str, Dict] = {}
     for item in pools:
         addr = (
             str(item.get("address") or item.get("whirlpoolAddress") or "")
             .strip()
             .lower()
         )
-        if addr == address_low:
-            return item
-    raise RuntimeError(f"Whirlpool {address} tidak ditemukan di response Orca.")
+        if addr:
+            index[addr] = item
+    return index
+
+
+def fetch_whirlpool_entries(addresses: List[str]) -> Dict[str, Dict]:
+    """Fetch list Orca sekali, lalu resolve banyak address via dict index."""
+    index = build_whirlpool_index(_fetch_pool_list())
+    found: Dict[str, Dict] = {}
+    for address in addresses:
+        entry = index.get(address.lower())
+        if entry is not None:
+            found[address] = entry
+    return found
+
+
+def fetch_whirlpool_entry(address: str) -> Dict:
+    entries = fetch_whirlpool_entries([address])
+    if address not in entries:
+        raise RuntimeError(f"Whirlpool {address} tidak ditemukan di response Orca.")
+    return entries[address]
+
+
+def _sqrt_to_price_py(sqrt_norm: float, dec_a: int, dec_b: int) -> float:
+    """Konversi sqrtPriceX64 (sudah dinormalisasi /2^64) -> price tokenB per tokenA."""
+    return sqrt_norm * sqrt_norm * 10.0 ** (dec_a - dec_b)
+
+
+# Kernel di-resolve lazy: import numpy/numba cukup mahal untuk script polling yang
+# di jalur umumnya hanya membaca field `price` dari API dan tidak butuh keduanya.
+_sqrt_to_price = None
+_sqrt_to_price_vec = None
+
+
+def _resolve_sqrt_kernel():
+    global _sqrt_to_price, _sqrt_to_price_vec
+    if _sqrt_to_price is not None:
+        return _sqrt_to_price
+    try:
+        import numpy as np
+        from numba import njit, prange
+
+        _sqrt_to_price = njit(cache=True, fastmath=True)(_sqrt_to_price_py)
+
+        @njit(cache=True, fastmath=True, parallel=True)
+        def _vec(sqrt_arr, dec_a_arr, dec_b_arr):  # pragma: no cover - butuh numba
+            """Varian batch untuk ingest multi-pool di masa depan."""
+            out = np.empty(sqrt_arr.shape[0], dtype=np.float64)
+            for i in prange(sqrt_arr.shape[0]):
+                out[i] = sqrt_arr[i] * sqrt_arr[i] * 10.0 ** (dec_a_arr[i] - dec_b_arr[i])
+            return out
+
+        _sqrt_to_price_vec = _vec
+    except ImportError:  # pragma: no cover - tergantung environment
+        _sqrt_to_price = _sqrt_to_price_py
+    return _sqrt_to_price
 
 
 def compute_price_from_entry(entry: Dict) -> float:
@@ -80,15 +138,15 @@ def compute_price_from_entry(entry: Dict) -> float:
         sqrt_int = int(sqrt_raw)
     except Exception as exc:  # noqa: BLE001
         raise RuntimeError(f"Gagal parse sqrtPrice: {exc}") from exc
-    # Konversi sqrtPriceX64 -> price tokenB per tokenA
-    price = (sqrt_int / 2 ** 64) ** 2 * 10 ** (dec_a - dec_b)
+    # Normalisasi di boundary (Python int bisa melebihi 64-bit), kernel terima float64.
+    price = _resolve_sqrt_kernel()(sqrt_int / 2 ** 64, dec_a, dec_b)
     return float(price)
 
 
 def append_prices(rows: List[Dict]) -> None:
     base_url = worker_base_url()
     payload = {"pair": PAIR_LABEL, "rows": rows}
-    resp = requests.post(f"{base_url}/append_prices", json=payload, timeout=15)
+    resp = post_json(f"{base_url}/append_prices", payload, timeout=15)
     resp.raise_for_status()
 
 
@@ -21,7 +21,8 @@ import sys
 from typing import Dict, List, Optional, Tuple, Type
 
 import pandas as pd
-import requests
+
+from http_session import post_rows_chunked
 
 # Ensure batch defaults even if env kosong (biar tidak tergantung util lain).
 if "RPC_BATCH_SIZE" not in os.environ:
@@ -80,9 +81,7 @@ def serialize_prices_numeric_ts(df: pd.DataFrame) -> List[Dict]:
 def append_prices(rows: List[Dict]) -> None:
     base_url = worker_base_url()
     label = pair_label()
-    payload = {"pair": label, "rows": rows}
-    resp = requests.post(f"{base_url}/append_prices", json=payload, timeout=20)
-    resp.raise_for_status()
+    post_rows_chunked(f"{base_url}/append_prices", label, rows, timeout=20)
 
 
 def main() -> None:
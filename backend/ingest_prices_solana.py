@@ -16,12 +16,15 @@ Timestamp boleh ISO atau epoch ms/seconds; script normalisasi ke epoch ms.
 """
 
 import json
+import math
 import os
 import sys
 from typing import Dict, List, Optional
 
+import numpy as np
 import pandas as pd
-import requests
+
+from http_session import get_json, post_rows_chunked
 
 WORKER_BASE_URL = os.getenv("WORKER_BASE_URL", "").rstrip("/")
 WORKER_INGEST_URL = os.getenv("WORKER_INGEST_URL", "").rstrip("/")
@@ -39,9 +42,7 @@ def worker_base_url() -> str:
 
 
 def load_from_url(url: str) -> List[Dict]:
-    resp = requests.get(url, timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
+    data = get_json(url, timeout=30)
     if isinstance(data, dict) and "data" in data:
         data = data["data"]
     if not isinstance(data, list):
@@ -53,7 +54,16 @@ def load_from_file(path: str) -> List[Dict]:
     if not os.path.exists(path):
         raise RuntimeError(f"File tidak ditemukan: {path}")
     if path.lower().endswith(".csv"):
-        df = pd.read_csv(path)
+        # Proyeksikan hanya kolom yang dipakai pipeline dan pakai engine pyarrow
+        # (multithreaded) bila terpasang; fallback ke parser C default.
+        wanted = {"timestamp", "ts", "price", "block", "pair"}
+        with open(path, "r", encoding="utf-8") as fh:
+            header = [col.strip() for col in fh.readline().split(",")]
+        usecols = [col for col in header if col in wanted] or None
+        try:
+            df = pd.read_csv(path, usecols=usecols, engine="pyarrow")
+        except (ImportError, ValueError):
+            df = pd.read_csv(path, usecols=usecols)
         return df.to_dict(orient="records")
     with open(path, "r", encoding="utf-8") as fh:
         data = json.load(fh)
@@ -69,51 +79,72 @@ def normalize_rows(raw_rows: List[Dict]) -> pd.DataFrame:
     if "timestamp" in df.columns:
         df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
     elif "ts" in df.columns:
-        # asumsi ms jika > 10^12, else sec
-        df["timestamp"] = pd.to_datetime(df["ts"].apply(_ts_to_datetime), utc=True, errors="coerce")
+        # asumsi ms jika > 10^12, else sec — satu np.where, bukan apply per-row
+        ts_raw = pd.to_numeric(df["ts"], errors="coerce").to_numpy(dtype=np.float64)
+        ts_ms = np.where(ts_raw > 1e12, ts_raw, ts_raw * 1000.0)
+        df["timestamp"] = pd.to_datetime(ts_ms, unit="ms", utc=True, errors="coerce")
     else:
         raise RuntimeError("Tidak ada kolom timestamp/ts.")
-    df["price"] = pd.to_numeric(df["price"], errors="coerce")
+    df["price"] = pd.to_numeric(df["price"], errors="coerce", downcast="float")
     if "block" in df.columns:
-        df["block"] = pd.to_numeric(df["block"], errors="coerce")
+        df["block"] = pd.to_numeric(df["block"], errors="coerce", downcast="integer")
+    if "pair" in df.columns:
+        df["pair"] = df["pair"].astype("category")
     df = df.dropna(subset=["timestamp", "price"])
-    df = df.sort_values("timestamp").reset_index(drop=True)
-    return df
+    # Sumber data umumnya sudah terurut; sort O(n log n) hanya jika perlu.
+    if not df["timestamp"].is_monotonic_increasing:
+        df = df.sort_values("timestamp")
+    return df.reset_index(drop=True)
 
 
-def _ts_to_datetime(val: object) -> Optional[pd.Timestamp]:
-    try:
-        num = float(val)
-    except Exception:
-        return pd.NaT
-    # detect ms vs sec
-    if num > 1e12:
-        return pd.to_datetime(num, unit="ms", utc=True, errors="coerce")
-    return pd.to_datetime(num, unit="s", utc=True, errors="coerce")
+def serialize_numeric_ts(df: pd.DataFrame) -> List[Dict]:
+    if df.empty:
+        return []
+    # Vectorized: one int64 op for all timestamps instead of per-row ts.timestamp().
+    ts_ms = (df["timestamp"].astype("int64") // 1_000_000).to_numpy()
+    price_arr = df["price"].to_numpy(dtype=np.float64)
+    rows: List[Dict] = [
+        {"ts": int(ts), "price": float(price)} for ts, price in zip(ts_ms, price_arr)
+    ]
+    if "block" in df.columns:
+        blk_arr = pd.to_numeric(df["block"], errors="coerce").to_numpy(dtype=np.float64)
+        # Hanya sentuh baris dengan block valid (flatnonzero), bukan cek per-row.
+        for i in np.flatnonzero(np.isfinite(blk_arr)):
+            rows[i]["block"] = int(blk_arr[i])
+    return rows
 
 
-def serialize_numeric_ts(df: pd.DataFrame) -> List[Dict]:
+def rows_fast_path(raw_rows: List[Dict]) -> Optional[List[Dict]]:
+    """Jalur cepat tanpa DataFrame saat input sudah bersih (ts numerik + price).
+
+    Mengembalikan rows siap-append (ts epoch ms, terurut) atau None jika ada
+    baris yang butuh normalisasi pandas (ISO timestamp, nilai kotor, dll).
+    """
     rows: List[Dict] = []
-    for row in df.to_dict(orient="records"):
-        ts = row.get("timestamp")
-        ts_ms: Optional[int] = None
-        if hasattr(ts, "timestamp"):
-            ts_ms = int(ts.timestamp() * 1000)
-        if ts_ms is None:
-            continue
-        rec: Dict = {"ts": ts_ms, "price": float(row.get("price", 0))}
+    for row in raw_rows:
+        if not isinstance(row, dict):
+            return None
+        ts = row.get("ts")
+        price = row.get("price")
+        if type(ts) not in (int, float) or type(price) not in (int, float):
+            return None
+        if not math.isfinite(ts) or not math.isfinite(price):
+            return None
+        ts_ms = int(ts) if ts > 1e12 else int(ts * 1000)
+        rec: Dict = {"ts": ts_ms, "price": float(price)}
         blk = row.get("block")
-        if blk is not None and not pd.isna(blk):
+        if blk is not None:
+            if type(blk) not in (int, float) or not math.isfinite(blk):
+                return None
             rec["block"] = int(blk)
         rows.append(rec)
+    rows.sort(key=lambda rec: rec["ts"])
     return rows
 
 
 def append_prices(rows: List[Dict]) -> None:
     base_url = worker_base_url()
-    payload = {"pair": PAIR_LABEL, "rows": rows}
-    resp = requests.post(f"{base_url}/append_prices", json=payload, timeout=30)
-    resp.raise_for_status()
+    post_rows_chunked(f"{base_url}/append_prices", PAIR_LABEL, rows, timeout=30)
 
 
 def main() -> None:
@@ -125,12 +156,13 @@ def main() -> None:
     else:
         raise RuntimeError("Set salah satu PRICE_SOURCE_URL atau PRICE_SOURCE_FILE.")
 
-    df = normalize_rows(raw)
-    if df.empty:
-        print("[ingest-solana] Tidak ada baris harga setelah normalisasi.")
-        return
-
-    rows = serialize_numeric_ts(df)
+    rows = rows_fast_path(raw)
+    if rows is None:
+        df = normalize_rows(raw)
+        if df.empty:
+            print("[ingest-solana] Tidak ada baris harga setelah normalisasi.")
+            return
+        rows = serialize_numeric_ts(df)
     if not rows:
         print("[ingest-solana] Tidak ada baris valid untuk append.")
         return
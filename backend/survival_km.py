@@ -1,13 +1,26 @@
 import argparse
+import functools
+import json
 import math
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 import requests
-from lifelines import KaplanMeierFitter
+from requests.adapters import HTTPAdapter
+
+# pyarrow opsional: dipakai untuk cache harga berformat Parquet (load/save
+# kolumnar yang jauh lebih cepat dari JSON). Tanpa pyarrow tetap jalan via JSON.
+try:
+    import pyarrow  # noqa: F401
+
+    HAS_PYARROW = True
+except ImportError:  # pragma: no cover - tergantung environment
+    HAS_PYARROW = False
 
 
 # Konfigurasi sumber data via RPC Base (gratis).
@@ -32,6 +45,12 @@ SAMPLE_INTERVAL_SEC = int(os.getenv("SAMPLE_INTERVAL_SEC", "600"))
 # Batasi batch panggilan eth_call agar tidak memicu rate limit terlalu cepat.
 BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", "10"))
 BATCH_SLEEP = float(os.getenv("RPC_BATCH_SLEEP", "0.5"))
+# Maksimum item per JSON-RPC batch request (Base public RPC membatasi 10).
+RPC_BATCH_MAX = int(os.getenv("RPC_BATCH_MAX", "10"))
+# Verifikasi block hanya pada tiap anchor ke-N; sisanya diinterpolasi linear.
+BLOCK_ANCHOR_STRIDE = int(os.getenv("BLOCK_ANCHOR_STRIDE", "16"))
+# Berapa batch JSON-RPC yang boleh in-flight bersamaan (thread pool).
+RPC_MAX_CONCURRENCY = int(os.getenv("RPC_MAX_CONCURRENCY", "4"))
 # Prefix nama file cache bisa diubah via env untuk membedakan pair.
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CACHE_PREFIX_ENV = os.getenv("CACHE_PREFIX")
@@ -44,11 +63,31 @@ WORKER_BASE_URL = os.getenv("WORKER_BASE_URL", "").strip()
 
 WINDOWS = [100, 200, 300, 500]
 HORIZONS = [6, 12, 24, 48]
+# Ambang penerimaan rekomendasi; di bawah ini baris pasti REJECTED sehingga
+# fit KM dilewati (km_surv = NaN).
+MIN_COUNT_TOTAL = 200
+MIN_COUNT_FULL = 100
+# Ukuran blok baris untuk scan out-of-band vektor (cap memori matriks ~blok*N).
+_SCAN_BLOCK = 1024
+# Konstanta konversi log-price -> tick Uniswap V3 (tick = ln(p)/ln(1.0001)).
+_LN_1_0001 = math.log(1.0001)
+_INV_LN_1_0001 = 1.0 / _LN_1_0001
+# Konversi durasi int64 nanodetik -> jam sebagai perkalian resiprokal.
+_NS_TO_HOURS = 1.0 / 3.6e12
 # Cache sederhana untuk mengurangi panggilan RPC berulang pada block/reserves.
 BLOCK_CACHE: Dict[int, Dict] = {}
 RESERVE_CACHE: Dict[int, Tuple[float, float]] = {}
 DECIMALS_CACHE: Dict[str, Tuple[int, int]] = {}
 
+# Session keep-alive khusus RPC: koneksi TLS ke provider di-reuse antar call
+# (menghemat handshake per request). Retry ditangani manual di rpc_call,
+# jadi adapter sengaja max_retries=0.
+_RPC_SESSION = requests.Session()
+_RPC_ADAPTER = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0)
+_RPC_SESSION.mount("https://", _RPC_ADAPTER)
+_RPC_SESSION.mount("http://", _RPC_ADAPTER)
+_RPC_SESSION.headers["Connection"] = "keep-alive"
+
 
 def rpc_call(method: str, params: List, max_retries: int = 5) -> Dict:
     """Minimal JSON-RPC call dengan retry sederhana (rate limit 429)."""
@@ -60,7 +99,7 @@ def rpc_call(method: str, params: List, max_retries: int = 5) -> Dict:
     last_error = None
     for attempt in range(1, max_retries + 1):
         try:
-            resp = requests.post(RPC_URL, headers=headers, json=payload, timeout=20)
+            resp = _RPC_SESSION.post(RPC_URL, headers=headers, json=payload, timeout=20)
             resp.raise_for_status()
             data = resp.json()
             if "error" in data:
@@ -81,6 +120,78 @@ def rpc_call(method: str, params: List, max_retries: int = 5) -> Dict:
     raise RuntimeError(f"RPC call failed after retries: {last_error}")
 
 
+def rpc_batch_call(calls: List[Tuple[str, List]], max_retries: int = 5) -> List:
+    """Kirim beberapa panggilan JSON-RPC sebagai satu array batch (satu HTTP POST).
+
+    Mengembalikan list hasil dengan urutan sama seperti `calls`; item yang gagal
+    (error per-entry) menjadi None. Base public RPC membatasi 10 entry per batch,
+    jadi pemanggil harus memecah sesuai RPC_BATCH_MAX.
+    """
+    if not calls:
+        return []
+    headers = {
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+    }
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    last_error = None
+    for attempt in range(1, max_retries + 1):
+        try:
+            resp = _RPC_SESSION.post(RPC_URL, headers=headers, json=payload, timeout=30)
+            resp.raise_for_status()
+            data = resp.json()
+            if isinstance(data, dict):
+                # Provider menolak batch sebagai satu error object.
+                raise RuntimeError(data.get("error", data))
+            by_id = {item.get("id"): item for item in data}
+            results: List = []
+            for i in range(len(calls)):
+                item = by_id.get(i)
+                if item is None or "error" in item:
+                    results.append(None)
+                else:
+                    results.append(item.get("result"))
+            return results
+        except requests.HTTPError as exc:  # type: ignore[attr-defined]
+            last_error = exc
+            status = getattr(exc.response, "status_code", None)
+            if status == 429 and attempt < max_retries:
+                time.sleep(1.5 ** (attempt - 1))
+                continue
+            raise
+        except Exception as exc:  # noqa: BLE001
+            last_error = exc
+            if attempt >= max_retries:
+                break
+            time.sleep(1.5 ** (attempt - 1))
+    raise RuntimeError(f"RPC batch call failed after retries: {last_error}")
+
+
+def _rpc_batch_call_many(groups: List[List[Tuple[str, List]]]) -> List[List]:
+    """Eksekusi beberapa batch JSON-RPC secara paralel dengan concurrency terbatas.
+
+    Gelombang berisi maksimal RPC_MAX_CONCURRENCY batch in-flight bersamaan;
+    BATCH_SLEEP dipertahankan hanya sebagai jeda antar gelombang supaya tetap
+    ramah rate limit provider. Wall time turun dari sum(RTT) ke ~max(RTT) per
+    gelombang.
+    """
+    if not groups:
+        return []
+    if len(groups) == 1:
+        return [rpc_batch_call(groups[0])]
+    results: List[List] = []
+    with ThreadPoolExecutor(max_workers=min(RPC_MAX_CONCURRENCY, len(groups))) as pool:
+        for start in range(0, len(groups), RPC_MAX_CONCURRENCY):
+            wave = groups[start : start + RPC_MAX_CONCURRENCY]
+            results.extend(pool.map(rpc_batch_call, wave))
+            if BATCH_SLEEP > 0 and start + RPC_MAX_CONCURRENCY < len(groups):
+                time.sleep(BATCH_SLEEP)
+    return results
+
+
 def _hex_to_int(h: str) -> int:
     return int(h, 16)
 
@@ -118,20 +229,73 @@ def get_latest_block() -> Tuple[int, int]:
     return num, ts
 
 
-def find_block_for_timestamp(target_ts: int, latest_num: int, latest_ts: int) -> int:
-    """Approximate block number for a target timestamp using iterative adjustment."""
-    guess = max(0, int(latest_num - (latest_ts - target_ts) / BASE_BLOCK_TIME_SEC))
-    for _ in range(10):
-        blk = get_block(hex(guess))
-        blk_ts = _hex_to_int(blk["timestamp"])
-        diff = blk_ts - target_ts
-        if abs(diff) <= 30:
-            return guess
-        adjust = int(diff / BASE_BLOCK_TIME_SEC)
-        if adjust == 0:
-            adjust = 1 if diff > 0 else -1
-        guess = max(0, guess - adjust)
-    return guess
+def _fetch_block_timestamps(block_nums: List[int]) -> List[Optional[int]]:
+    """Ambil timestamp banyak block via eth_getBlockByNumber dalam batch."""
+    groups = [
+        [
+            ("eth_getBlockByNumber", [hex(blk), False])
+            for blk in block_nums[start : start + RPC_BATCH_MAX]
+        ]
+        for start in range(0, len(block_nums), RPC_BATCH_MAX)
+    ]
+    out: List[Optional[int]] = []
+    for results in _rpc_batch_call_many(groups):
+        for blk in results:
+            out.append(_hex_to_int(blk["timestamp"]) if blk else None)
+    return out
+
+
+def resolve_blocks_for_timestamps(
+    targets: np.ndarray, latest_num: int, latest_ts: int
+) -> np.ndarray:
+    """Resolve block number untuk semua target timestamp sekaligus.
+
+    Tebakan awal vektor dari BASE_BLOCK_TIME_SEC; hanya anchor tiap
+    BLOCK_ANCHOR_STRIDE target yang diverifikasi via batch RPC (maks 3 ronde
+    koreksi), lalu block di antara anchor diinterpolasi linear. Ini mengganti
+    pencarian iteratif 10 langkah per timestamp (O(N*10) RPC) dengan
+    O(N/STRIDE) RPC ter-batch.
+    """
+    targets = np.asarray(targets, dtype=np.int64)
+    if targets.size == 0:
+        return np.empty(0, dtype=np.int64)
+    anchor_idx = np.arange(0, targets.size, BLOCK_ANCHOR_STRIDE)
+    if anchor_idx[-1] != targets.size - 1:
+        anchor_idx = np.append(anchor_idx, targets.size - 1)
+    anchor_ts = targets[anchor_idx]
+    guesses = np.maximum(
+        0, latest_num - ((latest_ts - anchor_ts) / BASE_BLOCK_TIME_SEC).astype(np.int64)
+    )
+    block_time = BASE_BLOCK_TIME_SEC
+    for _ in range(3):
+        blk_ts = _fetch_block_timestamps(guesses.tolist())
+        diffs = np.array(
+            [ts - tgt if ts is not None else 0 for ts, tgt in zip(blk_ts, anchor_ts)],
+            dtype=np.int64,
+        )
+        if np.all(np.abs(diffs) <= 30):
+            break
+        # Kalibrasi block time aktual dari dua anchor terverifikasi terjauh;
+        # koreksi berikutnya memakai rate riil chain, bukan konstanta env,
+        # sehingga konvergen lebih cepat saat block time bergeser dari asumsi.
+        valid = [k for k, ts in enumerate(blk_ts) if ts is not None]
+        if len(valid) >= 2:
+            k0, k1 = valid[0], valid[-1]
+            d_blk = int(guesses[k1]) - int(guesses[k0])
+            d_ts = blk_ts[k1] - blk_ts[k0]
+            if d_blk != 0 and d_ts != 0:
+                est = d_ts / d_blk
+                if 0.1 <= est <= 60:
+                    block_time = est
+        adjust = (diffs / block_time).astype(np.int64)
+        adjust[(adjust == 0) & (diffs > 30)] = 1
+        adjust[(adjust == 0) & (diffs < -30)] = -1
+        guesses = np.maximum(0, guesses - adjust)
+    if anchor_ts.size == 1:
+        return np.full(targets.size, guesses[0], dtype=np.int64)
+    blocks = np.rint(np.interp(targets, anchor_ts, guesses)).astype(np.int64)
+    blocks[anchor_idx] = guesses
+    return np.maximum(0, blocks)
 
 
 def call_get_reserves(pair: str, block_num: int) -> Optional[Tuple[float, float]]:
@@ -147,21 +311,64 @@ def call_get_reserves(pair: str, block_num: int) -> Optional[Tuple[float, float]
         hex(block_num),
     ]
     res = rpc_call("eth_call", params)
-    if not res or res == "0x":
+    parsed = _parse_reserves(res)
+    if parsed is not None:
+        RESERVE_CACHE[block_num] = parsed
+    return parsed
+
+
+def _parse_reserves(res: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Parse return data getReserves() (reserve0, reserve1) dari hex string."""
+    if not res or res == "0x" or len(res) < 130:
         return None
-    # getReserves returns three uint112/uint32 packed: 32 bytes each
+    # getReserves returns three uint112/uint32 packed: 32 bytes each.
+    # Decode hex -> bytes sekali lalu int.from_bytes (loop C atas byte packed),
+    # lebih cepat dari parser basis-16 string per reserve.
     try:
-        reserve0 = int(res[2:66], 16)
-        reserve1 = int(res[66:130], 16)
-        parsed = (float(reserve0), float(reserve1))
-        RESERVE_CACHE[block_num] = parsed
-        return parsed
+        raw = bytes.fromhex(res[2:130])
+        reserve0 = int.from_bytes(raw[:32], "big")
+        reserve1 = int.from_bytes(raw[32:64], "big")
+        return (float(reserve0), float(reserve1))
     except Exception:  # noqa: BLE001
         return None
 
 
+def call_get_reserves_batch(pair: str, block_nums: List[int]) -> Dict[int, Tuple[float, float]]:
+    """Fetch getReserves() untuk banyak block sekaligus via JSON-RPC batch.
+
+    Cache hits dilewati; sisanya dikirim dalam batch berukuran RPC_BATCH_MAX
+    (ceil(N/RPC_BATCH_MAX) round-trip, bukan N), paralel per gelombang lewat
+    _rpc_batch_call_many.
+    """
+    misses: List[int] = []
+    seen: set[int] = set()
+    for blk in block_nums:
+        if blk not in RESERVE_CACHE and blk not in seen:
+            seen.add(blk)
+            misses.append(blk)
+    chunks = [misses[start : start + RPC_BATCH_MAX] for start in range(0, len(misses), RPC_BATCH_MAX)]
+    groups = [
+        [("eth_call", [{"to": pair, "data": "0x0902f1ac"}, hex(blk)]) for blk in chunk]
+        for chunk in chunks
+    ]
+    for chunk, results in zip(chunks, _rpc_batch_call_many(groups)):
+        for blk, res in zip(chunk, results):
+            parsed = _parse_reserves(res)
+            if parsed is not None:
+                RESERVE_CACHE[blk] = parsed
+    return {blk: RESERVE_CACHE[blk] for blk in block_nums if blk in RESERVE_CACHE}
+
+
+# Flag supaya makedirs hanya dipanggil sekali per proses, bukan di tiap save.
+_CACHE_DIR_READY = False
+
+
 def ensure_cache_dir() -> None:
+    global _CACHE_DIR_READY
+    if _CACHE_DIR_READY:
+        return
     os.makedirs(CACHE_DIR, exist_ok=True)
+    _CACHE_DIR_READY = True
 
 
 def cache_prefix_for_pair(pair_address: str) -> str:
@@ -174,7 +381,8 @@ def cache_prefix_for_pair(pair_address: str) -> str:
 def cache_filepath(pair_address: str, lookback_hours: int, sample_interval_sec: int) -> str:
     ensure_cache_dir()
     prefix = cache_prefix_for_pair(pair_address)
-    filename = f"{prefix}_v2_LOOKBACK{lookback_hours}_INTERVAL{sample_interval_sec}.json"
+    ext = "parquet" if HAS_PYARROW else "json"
+    filename = f"{prefix}_v2_LOOKBACK{lookback_hours}_INTERVAL{sample_interval_sec}.{ext}"
     return os.path.join(CACHE_DIR, filename)
 
 
@@ -196,15 +404,23 @@ def _read_address_from_data(data: str) -> Optional[str]:
     return "0x" + data[-40:]
 
 
+# Memo eksplisit via lru_cache: lookup on-chain murni (token0/token1/decimals)
+# tidak berubah dalam satu proses. Pemanggil wajib menormalkan address ke
+# lowercase supaya key cache tidak terduplikasi.
+@functools.lru_cache(maxsize=1024)
 def get_pair_tokens(pair_address: str) -> Tuple[Optional[str], Optional[str]]:
     pair = pair_address.lower()
-    token0_data = _call_eth_call(pair, "0x0dfe1681")  # token0()
-    token1_data = _call_eth_call(pair, "0xd21220a7")  # token1()
+    # token0() dan token1() dalam satu batch JSON-RPC, bukan dua round-trip.
+    token0_data, token1_data = rpc_batch_call(
+        [
+            ("eth_call", [{"to": pair, "data": "0x0dfe1681"}, "latest"]),
+            ("eth_call", [{"to": pair, "data": "0xd21220a7"}, "latest"]),
+        ]
+    )
     return _read_address_from_data(token0_data), _read_address_from_data(token1_data)
 
 
-def get_token_decimals(token_address: str) -> Optional[int]:
-    data = _call_eth_call(token_address.lower(), "0x313ce567")  # decimals()
+def _parse_decimals(data: Optional[str]) -> Optional[int]:
     if not data or len(data) < 66:
         return None
     try:
@@ -213,6 +429,11 @@ def get_token_decimals(token_address: str) -> Optional[int]:
         return None
 
 
+@functools.lru_cache(maxsize=1024)
+def get_token_decimals(token_address: str) -> Optional[int]:
+    return _parse_decimals(_call_eth_call(token_address.lower(), "0x313ce567"))  # decimals()
+
+
 def resolve_decimals(pair_address: str) -> Tuple[int, int]:
     """Resolve token decimals via env override or on-chain introspection."""
     pair = pair_address.lower()
@@ -234,11 +455,23 @@ def resolve_decimals(pair_address: str) -> Tuple[int, int]:
         dec1 = None
 
     # Auto-detect from chain
-    token0_addr, token1_addr = get_pair_tokens(pair)
-    if dec0 is None and token0_addr:
-        dec0 = get_token_decimals(token0_addr)
-    if dec1 is None and token1_addr:
-        dec1 = get_token_decimals(token1_addr)
+    if dec0 is None or dec1 is None:
+        token0_addr, token1_addr = get_pair_tokens(pair)
+        if dec0 is None and dec1 is None and token0_addr and token1_addr:
+            # Kedua decimals() dalam satu batch (satu round-trip, bukan dua).
+            res0, res1 = rpc_batch_call(
+                [
+                    ("eth_call", [{"to": token0_addr.lower(), "data": "0x313ce567"}, "latest"]),
+                    ("eth_call", [{"to": token1_addr.lower(), "data": "0x313ce567"}, "latest"]),
+                ]
+            )
+            dec0 = _parse_decimals(res0)
+            dec1 = _parse_decimals(res1)
+        else:
+            if dec0 is None and token0_addr:
+                dec0 = get_token_decimals(token0_addr)
+            if dec1 is None and token1_addr:
+                dec1 = get_token_decimals(token1_addr)
 
     # Fallback to defaults if detection fails
     dec0 = dec0 if dec0 is not None else DEFAULT_TOKEN0_DECIMALS
@@ -247,18 +480,50 @@ def resolve_decimals(pair_address: str) -> Tuple[int, int]:
     return dec0, dec1
 
 
-def load_cached_prices(path: str, start_ts: int, end_ts: int) -> pd.DataFrame:
-    """Load cached price data between start_ts and end_ts (inclusive)."""
+def _read_json_cache(path: str) -> pd.DataFrame:
+    """Baca file cache format JSON lama ({"meta","data"} atau frame langsung)."""
     if not os.path.exists(path):
         return pd.DataFrame()
     try:
         loaded = pd.read_json(path)
         if isinstance(loaded, pd.DataFrame) and "timestamp" in loaded.columns:
-            df = loaded
-        else:
-            df = pd.DataFrame(loaded.get("data", []))  # type: ignore[arg-type]
+            return loaded
+        return pd.DataFrame(loaded.get("data", []))  # type: ignore[arg-type]
     except ValueError:
+        # Format payload {"meta","data"} hasil pd.Series(...).to_json tidak bisa
+        # diparse sebagai frame; baca ulang sebagai series lalu ambil "data".
+        try:
+            loaded = pd.read_json(path, typ="series")
+            return pd.DataFrame(loaded.get("data", []))
+        except ValueError:
+            return pd.DataFrame()
+
+
+def _read_cache_frame(path: str) -> pd.DataFrame:
+    """Baca cache harga; Parquet bila tersedia, dengan migrasi one-shot dari JSON."""
+    if not path.endswith(".parquet"):
+        return _read_json_cache(path)
+    legacy = path[: -len(".parquet")] + ".json"
+    if not os.path.exists(path) and os.path.exists(legacy):
+        df = _read_json_cache(legacy)
+        if not df.empty:
+            try:
+                df.to_parquet(path, engine="pyarrow", compression="zstd")
+                print(f"Migrated JSON price cache to Parquet: {path}")
+            except Exception as exc:  # noqa: BLE001
+                print(f"Warning: failed to migrate cache to Parquet: {exc}")
+        return df
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    try:
+        return pd.read_parquet(path)
+    except Exception:  # noqa: BLE001 - cache korup: anggap kosong, akan ditulis ulang
         return pd.DataFrame()
+
+
+def load_cached_prices(path: str, start_ts: int, end_ts: int) -> pd.DataFrame:
+    """Load cached price data between start_ts and end_ts (inclusive)."""
+    df = _read_cache_frame(path)
     if df.empty:
         return df
     df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
@@ -270,9 +535,19 @@ def load_cached_prices(path: str, start_ts: int, end_ts: int) -> pd.DataFrame:
 
 
 def save_cached_prices(df: pd.DataFrame, path: str) -> None:
-    """Persist price data to cache file as JSON records."""
+    """Persist price data to cache file (Parquet bila tersedia, else JSON)."""
     ensure_cache_dir()
-    payload = {"meta": build_meta(PAIR_ADDRESS), "data": df.to_dict(orient="records")}
+    if path.endswith(".parquet"):
+        try:
+            # Kolumnar + zstd: timestamp tersimpan native int64 ns, tanpa
+            # round-trip teks ISO saat load berikutnya.
+            df.to_parquet(path, engine="pyarrow", compression="zstd")
+            return
+        except Exception as exc:  # noqa: BLE001
+            print(f"Warning: failed to write Parquet cache ({exc}); falling back to JSON.")
+            path = path[: -len(".parquet")] + ".json"
+    # Serialisasi kolom (satu pass C per kolom) alih-alih to_dict per baris.
+    payload = {"meta": build_meta(PAIR_ADDRESS), "data": _serialize_prices(df)}
     pd.Series(payload).to_json(path, date_format="iso")
 
 
@@ -304,7 +579,7 @@ def get_price_data(
     if worker_base_url:
         try:
             pair_for_last = pair_label if pair_label else cache_prefix_for_pair(pair_address)
-            resp = requests.get(
+            resp = _RPC_SESSION.get(
                 f"{worker_base_url.rstrip('/')}/last_ts",
                 params={"pair": pair_for_last},
                 timeout=10,
@@ -318,7 +593,6 @@ def get_price_data(
             print(f"Warning: failed to fetch last_ts from Worker: {exc}")
 
     latest_num, latest_ts = get_latest_block()
-    records: List[Dict] = []
     now = latest_ts
     start_ts = now - lookback_hours * 3600
     if last_ts_sec and last_ts_sec < now:
@@ -335,38 +609,56 @@ def get_price_data(
     if not cached_df.empty:
         print(f"Using cached history to minimize RPC calls ({len(cached_df)} rows)")
 
-    call_counter = 0
-    existing_ts: set[int] = set()
+    # Satu operasi int64 vektor untuk seluruh kolom, bukan .timestamp() per baris.
+    existing_ts: frozenset = frozenset()
     if not cached_df.empty:
-        existing_ts = {int(ts.timestamp()) for ts in cached_df["timestamp"]}
+        existing_ts = frozenset(
+            (cached_df["timestamp"].astype("int64") // 1_000_000_000).to_numpy().tolist()
+        )
 
+    # Fase 1: resolve block number untuk semua target timestamp yang belum ada.
+    targets: List[int] = []
     while target_ts <= now:
-        if target_ts in existing_ts:
-            target_ts += sample_interval_sec
-            continue
-        blk_num = find_block_for_timestamp(target_ts, latest_num, latest_ts)
-        reserves = call_get_reserves(pair_address, blk_num)
+        if target_ts not in existing_ts:
+            targets.append(target_ts)
+        target_ts += sample_interval_sec
+
+    block_nums = resolve_blocks_for_timestamps(
+        np.asarray(targets, dtype=np.int64), latest_num, latest_ts
+    ).tolist()
+
+    # Fase 2: satu gelombang batch eth_call untuk semua reserves sekaligus.
+    reserves_by_block = call_get_reserves_batch(pair_address, block_nums)
+    # Buffer SoA dialokasikan sekali seukuran batas atas sampel; isi per indeks
+    # (tanpa list-of-dict per baris) lalu slice [:k] saat membentuk frame.
+    n_max = len(targets)
+    ts_buf = np.empty(n_max, dtype=np.int64)
+    price_buf = np.empty(n_max, dtype=np.float64)
+    block_buf = np.empty(n_max, dtype=np.int64)
+    k = 0
+    for ts_target, blk_num in zip(targets, block_nums):
+        reserves = reserves_by_block.get(blk_num)
         if reserves:
             r0, r1 = reserves
             if r0 > 0 and r1 > 0:
-                price = (r1 / r0) * 10 ** (dec0 - dec1)
-                records.append(
-                    {
-                        "timestamp": pd.to_datetime(target_ts, unit="s", utc=True),
-                        "price": price,
-                        "block": blk_num,
-                    }
-                )
-        call_counter += 1
-        if BATCH_SIZE > 0 and call_counter % BATCH_SIZE == 0:
-            time.sleep(BATCH_SLEEP)
-        target_ts += sample_interval_sec
+                ts_buf[k] = ts_target
+                price_buf[k] = (r1 / r0) * 10 ** (dec0 - dec1)
+                block_buf[k] = blk_num
+                k += 1
 
     df_parts = []
     if not cached_df.empty:
         df_parts.append(cached_df)
-    if records:
-        df_parts.append(pd.DataFrame(records))
+    if k:
+        # Konversi datetime satu kali vektor di akhir, bukan per sampel.
+        new_df = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(ts_buf[:k], unit="s", utc=True),
+                "price": price_buf[:k],
+                "block": block_buf[:k],
+            }
+        )
+        df_parts.append(new_df)
 
     df = pd.concat(df_parts, ignore_index=True) if df_parts else pd.DataFrame()
     df = df.dropna()
@@ -380,84 +672,254 @@ def get_price_data(
 
 def compute_ticks(df: pd.DataFrame) -> pd.DataFrame:
     """Compute log price and Uniswap V3 tick."""
-    df = df.copy()
-    df = df[df["price"] > 0].reset_index(drop=True)
-    df["log_price"] = np.log(df["price"])
-    df["tick"] = np.floor(df["log_price"] / math.log(1.0001)).astype(int)
-    return df
+    # Hitung di buffer NumPy (bukan aritmetika Series) dengan konstanta
+    # 1/ln(1.0001) supaya pembagian jadi perkalian.
+    prices = df["price"].to_numpy(dtype=np.float64)
+    mask = prices > 0
+    if mask.all():
+        base = df
+    else:
+        base = df[mask].reset_index(drop=True)
+        prices = prices[mask]
+    log_price = np.log(prices)
+    # int32 cukup (tick Uniswap terbatas +-887272) dan memotong setengah
+    # bandwidth memori saat scan survival membaca kolom ini.
+    tick = np.floor(log_price * _INV_LN_1_0001).astype(np.int32)
+    # assign: frame baru berbagi buffer kolom lama (tanpa df.copy() penuh),
+    # frame milik pemanggil tidak tersentuh.
+    return base.assign(log_price=log_price, tick=tick)
+
+
+# Kernel numba di-resolve lazy (sekali per proses); None berarti belum dicoba,
+# False berarti numba tidak tersedia dan jalur NumPy blok yang dipakai.
+# Lock wajib: inisialisasi pertama numba (import + kompilasi kernel paralel)
+# dari beberapa thread sekaligus membuat proses hang saat interpreter shutdown.
+_SCAN_KERNEL = None
+_SCAN_KERNEL_LOCK = threading.Lock()
+
+
+def _resolve_scan_kernel():
+    global _SCAN_KERNEL
+    if _SCAN_KERNEL is not None:
+        return _SCAN_KERNEL or None
+    with _SCAN_KERNEL_LOCK:
+        return _resolve_scan_kernel_locked()
+
+
+def _resolve_scan_kernel_locked():
+    global _SCAN_KERNEL
+    if _SCAN_KERNEL is not None:  # thread lain sudah menyelesaikan resolve
+        return _SCAN_KERNEL or None
+    try:
+        from numba import njit
+
+        # Sengaja TANPA parallel=True: generate_recommendation sudah menjalankan
+        # kernel ini bersamaan dari thread per horizon (nopython melepas GIL),
+        # dan threading layer numba (TBB) yang diinisialisasi dari thread
+        # non-main membuat proses hang saat interpreter shutdown.
+        @njit(fastmath=True, cache=True, boundscheck=False)
+        def _scan_exits_nb(ticks, limit_idx, ws):  # pragma: no cover - butuh numba
+            # ws harus terurut naik: deviasi yang menembus W kecil otomatis
+            # menembus semua W yang lebih kecil lagi, jadi satu sweep waktu per
+            # baris cukup untuk seluruh window (pointer k maju monoton).
+            n = ticks.shape[0]
+            m = ws.shape[0]
+            out = np.full((m, n), -1, dtype=np.int64)
+            for i in range(n):
+                center = ticks[i]
+                limit = limit_idx[i]
+                k = 0
+                for j in range(i + 1, limit):
+                    dev = abs(ticks[j] - center)
+                    while k < m and dev > ws[k]:
+                        out[k, i] = j
+                        k += 1
+                    if k == m:
+                        break
+            return out
+
+        # Pemanasan dengan dtype produksi: njit baru kompilasi pada panggilan
+        # pertama, jadi paksa kompilasi selesai di thread yang memegang lock,
+        # bukan berebut di worker pool.
+        _scan_exits_nb(
+            np.zeros(1, dtype=np.int32),
+            np.ones(1, dtype=np.int64),
+            np.zeros(1, dtype=np.int64),
+        )
+        _SCAN_KERNEL = _scan_exits_nb
+    except ImportError:  # pragma: no cover - tergantung environment
+        _SCAN_KERNEL = False
+        return None
+    return _SCAN_KERNEL
+
+
+def _scan_exits(
+    ts_ns: np.ndarray, ticks: np.ndarray, limit_idx: np.ndarray, windows: List[int]
+) -> Dict[int, np.ndarray]:
+    """Cari indeks exit pertama per baris untuk semua window sekaligus.
+
+    Bila numba tersedia, loop exit per baris dikompilasi native (memori
+    konstan — tidak ada matriks N^2; paralelisme datang dari thread per
+    horizon di generate_recommendation). Fallback: matriks deviasi
+    |tick[j] - tick[i]| dan mask horizon dibangun sekali per blok baris lalu
+    dipakai ulang untuk tiap W (amortisasi scan lintas window).
+    Hasil: dict W -> exit_idx (-1 jika tidak ada exit dalam horizon).
+    """
+    n = len(ts_ns)
+    # Shortcut rentang global: window selebar/ lebih lebar dari seluruh rentang
+    # tick seri tidak mungkin tertembus deviasi mana pun -> tanpa scan (O(n)).
+    span = int(ticks.max()) - int(ticks.min()) if n else 0
+    exit_idx: Dict[int, np.ndarray] = {
+        W: np.full(n, -1, dtype=np.int64) for W in windows if W >= span
+    }
+    active = [W for W in windows if W < span]
+    if not active:
+        return exit_idx
+    kernel = _resolve_scan_kernel()
+    if kernel is not None:
+        # Satu panggilan kernel untuk semua window aktif: urutkan W naik,
+        # kernel mengembalikan matriks (m, n) exit index per window.
+        order = sorted(range(len(active)), key=lambda k: active[k])
+        ws = np.asarray([active[k] for k in order], dtype=np.int64)
+        # searchsorted sudah menghasilkan intp (= int64 di platform 64-bit);
+        # copy=False menghindari duplikasi array saat dtype sudah cocok.
+        out = kernel(ticks, limit_idx.astype(np.int64, copy=False), ws)
+        exit_idx.update({active[k]: out[pos] for pos, k in enumerate(order)})
+        return exit_idx
+    exit_idx.update({W: np.full(n, -1, dtype=np.int64) for W in active})
+    col = np.arange(n)
+    for start in range(0, n, _SCAN_BLOCK):
+        stop = min(start + _SCAN_BLOCK, n)
+        dev = np.abs(ticks[None, :] - ticks[start:stop, None])
+        in_win = (col[None, :] > col[start:stop, None]) & (
+            col[None, :] < limit_idx[start:stop, None]
+        )
+        for W in active:
+            oob = (dev > W) & in_win
+            hit = oob.any(axis=1)
+            first = oob.argmax(axis=1)
+            rows = np.flatnonzero(hit) + start
+            exit_idx[W][rows] = first[hit]
+    return exit_idx
+
+
+def compute_survival_for_horizon(
+    df: pd.DataFrame, horizon_hours: int, windows: List[int]
+) -> List[Dict]:
+    """Compute Kaplan-Meier survival metrics for one horizon across windows.
+
+    Limit horizon (searchsorted) dan scan deviasi dihitung sekali, lalu
+    dibagikan ke semua W; hanya fit KM per (W, horizon) yang tersisa.
+    """
+    if df.empty or not windows:
+        return []
+
+    # Kolom timestamp dari pipeline sudah datetime64; parse ulang hanya bila
+    # pemanggil eksternal mengirim string/objek.
+    ts_series = df["timestamp"]
+    if not pd.api.types.is_datetime64_any_dtype(ts_series):
+        ts_series = pd.to_datetime(ts_series, utc=True)
+    ts_ns = ts_series.astype("int64").to_numpy()
+    ticks = df["tick"].to_numpy(dtype=np.int32)
+
+    n = len(df)
+    horizon_ns = int(horizon_hours * 3600) * 1_000_000_000
+    limit_ns = ts_ns + horizon_ns
+    last_ns = int(ts_ns[-1])
+    # Indeks eksklusif: semua j < limit_idx[i] memenuhi ts[j] <= limit[i].
+    limit_idx = np.searchsorted(ts_ns, limit_ns, side="right")
+    follow_arr = limit_ns <= last_ns
+    censor_ns = np.minimum(limit_ns, last_ns)
+
+    exit_by_window = _scan_exits(ts_ns, ticks, limit_idx, windows)
+    results: List[Dict] = []
+    for W in windows:
+        exit_idx = exit_by_window[W]
+        event_mask = exit_idx >= 0
+        events_arr = event_mask.astype(np.int8)
+        exit_ns = np.where(event_mask, ts_ns[np.clip(exit_idx, 0, n - 1)], censor_ns)
+        durations_arr = (exit_ns - ts_ns).astype(np.float64) * _NS_TO_HOURS
+        results.append(
+            _survival_metrics(durations_arr, events_arr, follow_arr, ticks, W, horizon_hours)
+        )
+    return results
 
 
 def compute_survival(df: pd.DataFrame, W: int, horizon_hours: int) -> Optional[Dict]:
     """Compute Kaplan-Meier survival metrics for a given tick window W and horizon."""
-    if df.empty:
-        return None
+    results = compute_survival_for_horizon(df, horizon_hours, [W])
+    return results[0] if results else None
 
-    timestamps = df["timestamp"].to_numpy()
-    ticks = df["tick"].to_numpy()
-    prices = df["price"].to_numpy()
 
-    last_time = timestamps[-1]
-    horizon_delta = np.timedelta64(int(horizon_hours * 3600), "s")
+# z untuk CI dua sisi 95% (alpha=0.05), sama dengan default lifelines.
+_KM_Z = 1.959963984540054
 
-    durations: List[float] = []
-    events: List[int] = []
-    full_followup: List[bool] = []
 
-    n = len(df)
-    for i in range(n):
-        t_start = timestamps[i]
-        center_tick = ticks[i]
-        lower = center_tick - W
-        upper = center_tick + W
-        limit_time = t_start + horizon_delta
-
-        has_full = limit_time <= last_time
-        exit_time = limit_time if has_full else last_time
-        event = 0
-
-        j = i + 1
-        while j < n and timestamps[j] <= limit_time:
-            if ticks[j] < lower or ticks[j] > upper:
-                event = 1
-                exit_time = timestamps[j]
-                break
-            j += 1
-
-        duration_hours = (exit_time - t_start) / np.timedelta64(1, "h")
-        durations.append(float(duration_hours))
-        events.append(int(event))
-        full_followup.append(has_full)
-
-    durations_arr = np.array(durations, dtype=float)
-    events_arr = np.array(events, dtype=int)
-    follow_arr = np.array(full_followup, dtype=bool)
-
-    kmf = KaplanMeierFitter()
-    kmf.fit(durations_arr, event_observed=events_arr)
-    km_surv = float(kmf.predict(horizon_hours))
-
-    # Ambil CI dengan reindex + ffill karena versi lifelines di environment tidak punya confidence_interval_at_times
-    ci_table = kmf.confidence_interval_
-    ci_at = (
-        ci_table.reindex(ci_table.index.union([horizon_hours]))
-        .sort_index()
-        .ffill()
-        .loc[horizon_hours]
-    )
-    ci_low = float(ci_at.iloc[0])
-    ci_high = float(ci_at.iloc[1])
+def _km_estimate(
+    durations_arr: np.ndarray, events_arr: np.ndarray, horizon_hours: float
+) -> Tuple[float, float, float]:
+    """Estimator Kaplan-Meier + CI exponential-Greenwood langsung di NumPy.
 
+    Menghasilkan (S(horizon), ci_low, ci_high) identik dengan
+    KaplanMeierFitter.fit + predict + confidence_interval_ milik lifelines,
+    tanpa membangun event table/DataFrame per panggilan.
+    """
+    order = np.argsort(durations_arr, kind="stable")
+    durs = durations_arr[order]
+    evs = events_arr[order].astype(bool)
+    ev_durs = durs[evs]
+    event_times = np.unique(ev_durs)
+    if event_times.size == 0:
+        return 1.0, 1.0, 1.0
+    n_at_risk = len(durs) - np.searchsorted(durs, event_times, side="left")
+    deaths = (
+        np.searchsorted(ev_durs, event_times, side="right")
+        - np.searchsorted(ev_durs, event_times, side="left")
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        surv = np.cumprod(1.0 - deaths / n_at_risk)
+        greenwood = np.cumsum(deaths / (n_at_risk * (n_at_risk - deaths).astype(np.float64)))
+        log_surv = np.log(surv)
+        theta = _KM_Z * np.sqrt(greenwood) / log_surv
+        ci_low = np.exp(-np.exp(np.log(-log_surv) - theta))
+        ci_high = np.exp(-np.exp(np.log(-log_surv) + theta))
+    # Batas degenerate: S=0 atau S=1 membuat log meledak; CI kolaps ke titik.
+    ci_low = np.where(surv == 0, 0.0, np.where(surv == 1, 1.0, ci_low))
+    ci_high = np.where(surv == 0, 0.0, np.where(surv == 1, 1.0, ci_high))
+    pos = int(np.searchsorted(event_times, horizon_hours, side="right")) - 1
+    if pos < 0:
+        return 1.0, 1.0, 1.0
+    return float(surv[pos]), float(ci_low[pos]), float(ci_high[pos])
+
+
+def _survival_metrics(
+    durations_arr: np.ndarray,
+    events_arr: np.ndarray,
+    follow_arr: np.ndarray,
+    ticks: np.ndarray,
+    W: int,
+    horizon_hours: int,
+) -> Dict:
+    """Estimasi KM + susun dict metrik untuk satu kombinasi (W, horizon)."""
     count_total = len(durations_arr)
     count_full = int(follow_arr.sum())
+    if count_total < MIN_COUNT_TOTAL or count_full < MIN_COUNT_FULL:
+        # Baris pasti REJECTED oleh ambang jumlah sampel; tidak perlu bayar
+        # sort + cumprod estimator hanya untuk angka yang tidak dipakai.
+        km_surv = ci_low = ci_high = float("nan")
+    else:
+        km_surv, ci_low, ci_high = _km_estimate(durations_arr, events_arr, horizon_hours)
     survivors_full = int(((events_arr == 0) & (durations_arr >= horizon_hours) & follow_arr).sum())
     empirical_full = float(survivors_full / count_full) if count_full else float("nan")
 
     center_tick = int(np.median(ticks))
     tick_from = center_tick - W
     tick_to = center_tick + W
-    price_from = float(np.power(1.0001, tick_from))
-    price_to = float(np.power(1.0001, tick_to))
-    price_center = float(np.power(1.0001, center_tick))
+    # Identitas 1.0001^t = exp(t*ln(1.0001)): math.exp skalar jauh lebih murah
+    # daripada dispatch ufunc np.power untuk tiga nilai tunggal.
+    price_from = math.exp(tick_from * _LN_1_0001)
+    price_to = math.exp(tick_to * _LN_1_0001)
+    price_center = math.exp(center_tick * _LN_1_0001)
     percent_range_total = (price_to - price_from) / price_center * 100
 
     return {
@@ -479,35 +941,53 @@ def compute_survival(df: pd.DataFrame, W: int, horizon_hours: int) -> Optional[D
 
 def generate_recommendation(df: pd.DataFrame) -> pd.DataFrame:
     """Generate recommendation DataFrame across windows and horizons."""
+    # Tiap horizon independen setelah fusi per-horizon; jalankan paralel dengan
+    # thread (kernel NumPy melepas GIL, dan df tidak perlu pickling ala proses).
+    # pool.map menjaga urutan hasil sesuai HORIZONS.
+    # Resolve kernel sebelum pool berdiri supaya worker tidak pernah menjadi
+    # thread pertama yang menginisialisasi numba.
+    _resolve_scan_kernel()
+    with ThreadPoolExecutor(max_workers=len(HORIZONS)) as pool:
+        per_horizon = pool.map(functools.partial(_recommendation_rows_for_horizon, df), HORIZONS)
+    rows = [row for horizon_rows in per_horizon for row in horizon_rows]
+    return pd.DataFrame(rows)
+
+
+def _recommendation_rows_for_horizon(df: pd.DataFrame, horizon: int) -> List[Dict]:
+    """Hitung baris rekomendasi semua window untuk satu horizon."""
     rows: List[Dict] = []
-    for horizon in HORIZONS:
-        for window in WINDOWS:
-            metrics = compute_survival(df, window, horizon)
-            if not metrics:
-                continue
-            accepted = (
-                metrics["km_surv"] >= 0.6
-                and metrics["count_total"] >= 200
-                and metrics["count_full_followup"] >= 100
-            )
-            reasons = []
+    # Satu panggilan per horizon: scan deviasi dibagikan ke semua window.
+    for metrics in compute_survival_for_horizon(df, horizon, WINDOWS):
+        if not metrics:
+            continue
+        accepted = (
+            metrics["km_surv"] >= 0.6
+            and metrics["count_total"] >= MIN_COUNT_TOTAL
+            and metrics["count_full_followup"] >= MIN_COUNT_FULL
+        )
+        reasons = []
+        if math.isnan(metrics["km_surv"]):
+            reasons.append("km_surv skipped (counts below threshold)")
+        else:
             reasons.append("km_surv >= 0.6" if metrics["km_surv"] >= 0.6 else "km_surv < 0.6")
-            reasons.append(
-                "count_total >= 200" if metrics["count_total"] >= 200 else "count_total < 200"
-            )
-            reasons.append(
-                "count_full >= 100"
-                if metrics["count_full_followup"] >= 100
-                else "count_full < 100"
-            )
+        reasons.append(
+            "count_total >= 200"
+            if metrics["count_total"] >= MIN_COUNT_TOTAL
+            else "count_total < 200"
+        )
+        reasons.append(
+            "count_full >= 100"
+            if metrics["count_full_followup"] >= MIN_COUNT_FULL
+            else "count_full < 100"
+        )
 
-            row = {
-                **metrics,
-                "status": "ACCEPTED" if accepted else "REJECTED",
-                "reason": " & ".join(reasons),
-            }
-            rows.append(row)
-    return pd.DataFrame(rows)
+        row = {
+            **metrics,
+            "status": "ACCEPTED" if accepted else "REJECTED",
+            "reason": " & ".join(reasons),
+        }
+        rows.append(row)
+    return rows
 
 
 def print_recommendations(df: pd.DataFrame) -> None:
@@ -516,93 +996,91 @@ def print_recommendations(df: pd.DataFrame) -> None:
         print("No recommendations available (empty DataFrame).")
         return
     df_sorted = df.sort_values(["horizon_hours", "W"])
-    for _, row in df_sorted.iterrows():
-        print(f"H={int(row['horizon_hours'])}h Recommendation ({row['status']}):")
-        print(f"    W={int(row['W'])} ticks per side")
-        print(f"    reason: {row['reason']}")
+    # itertuples: namedtuple ringan per baris, tanpa boxing Series ala iterrows.
+    for row in df_sorted.itertuples(index=False):
+        print(f"H={int(row.horizon_hours)}h Recommendation ({row.status}):")
+        print(f"    W={int(row.W)} ticks per side")
+        print(f"    reason: {row.reason}")
         print("    metrics:")
-        print(f"        count_total: {int(row['count_total'])}")
-        print(f"        count_full_followup: {int(row['count_full_followup'])}")
-        empirical_full = row['empirical_full']
+        print(f"        count_total: {int(row.count_total)}")
+        print(f"        count_full_followup: {int(row.count_full_followup)}")
+        empirical_full = row.empirical_full
         empirical_str = "nan" if math.isnan(empirical_full) else f"{empirical_full:.6f}"
         print(f"        empirical_full: {empirical_str}")
         print(
-            f"        km_surv: {row['km_surv']:.6f}  CI [{row['km_ci_low']:.6f} .. {row['km_ci_high']:.6f}]"
+            f"        km_surv: {row.km_surv:.6f}  CI [{row.km_ci_low:.6f} .. {row.km_ci_high:.6f}]"
         )
-        print(f"    ticks (from..to): {int(row['tick_from'])} .. {int(row['tick_to'])}")
+        print(f"    ticks (from..to): {int(row.tick_from)} .. {int(row.tick_to)}")
         print(
             "    price bounds (from..to): "
-            f"{row['price_from']:.6f} .. {row['price_to']:.6f}"
+            f"{row.price_from:.6f} .. {row.price_to:.6f}"
         )
-        print(f"    percent_range_total: {row['percent_range_total']:.5f}%\n")
+        print(f"    percent_range_total: {row.percent_range_total:.5f}%\n")
 
 def save_recommendations_json(df: pd.DataFrame, path: str) -> Dict:
     ensure_cache_dir()
-    # Clean NaN/Infinity values before converting to dict
-    df_clean = df.replace([np.inf, -np.inf], np.nan)
-    df_clean = df_clean.where(pd.notnull(df_clean), None)
-    records = []
-    for row in df_clean.to_dict(orient="records"):
-        cleaned_row = {}
-        for key, value in row.items():
-            if isinstance(value, (int, float)):
-                if value is not None and (np.isnan(value) or np.isinf(value)):
-                    cleaned_row[key] = None
-                else:
-                    cleaned_row[key] = value
-            else:
-                cleaned_row[key] = value
-        records.append(cleaned_row)
+    # Substitusi NaN/inf -> None (JSON null) per kolom sebelum merangkai
+    # record. Payload yang dikembalikan dipakai ulang oleh ingest Worker,
+    # jadi tidak boleh membawa NaN: encoder stdlib menulis literal NaN yang
+    # ditolak JSON.parse di sisi Worker/frontend.
+    clean = df.replace([np.inf, -np.inf], np.nan)
+    columns = list(clean.columns)
+    data = {col: clean[col].to_numpy().tolist() for col in columns}
+    for col in clean.columns[clean.isna().any()]:
+        data[col] = [None if pd.isna(value) else value for value in data[col]]
+    records = [dict(zip(columns, vals)) for vals in zip(*(data[col] for col in columns))]
     payload = {"meta": build_meta(PAIR_ADDRESS), "data": records}
-    # Use json.dumps to ensure proper NaN handling
-    import json
-    with open(path, 'w') as f:
+    # allow_nan=False: NaN yang lolos substitusi gagal keras di sini, bukan
+    # baru meledak saat payload di-parse konsumen.
+    with open(path, "w") as f:
         json.dump(payload, f, allow_nan=False, default=str)
     return payload
 
 
+def _splice_block_column(records: List[Dict], df: pd.DataFrame) -> None:
+    """Tambahkan field block ke records untuk baris dengan block valid (finite)."""
+    if "block" not in df.columns:
+        return
+    blk_arr = pd.to_numeric(df["block"], errors="coerce").to_numpy(dtype=float)
+    for rec, blk in zip(records, blk_arr):
+        if np.isfinite(blk):
+            rec["block"] = int(blk)
+
+
 def _serialize_prices(df: pd.DataFrame) -> List[Dict]:
-    records: List[Dict] = []
-    for row in df.to_dict(orient="records"):
-        ts = row.get("timestamp")
-        if hasattr(ts, "isoformat"):
-            ts_str = ts.isoformat()
-        else:
-            ts_str = str(ts)
-        rec: Dict = {"timestamp": ts_str, "price": float(row.get("price", 0))}
-        blk = row.get("block")
-        if blk is not None and not (isinstance(blk, float) and math.isnan(blk)):
-            try:
-                rec["block"] = int(blk)
-            except Exception:  # noqa: BLE001
-                pass
-        records.append(rec)
+    if df.empty:
+        return []
+    # Satu pass kolom (bukan to_dict per-row + loop kedua).
+    ts_series = df["timestamp"]
+    if pd.api.types.is_datetime64_any_dtype(ts_series):
+        ts_arr = ts_series.dt.strftime("%Y-%m-%dT%H:%M:%S%z").to_numpy()
+    else:
+        ts_arr = ts_series.astype(str).to_numpy()
+    price_arr = df["price"].to_numpy(dtype=float)
+    records: List[Dict] = [
+        {"timestamp": ts, "price": float(price)} for ts, price in zip(ts_arr, price_arr)
+    ]
+    _splice_block_column(records, df)
     return records
 
 
 def _serialize_prices_numeric_ts(df: pd.DataFrame) -> List[Dict]:
     """Serialize price rows with numeric epoch milliseconds for incremental append."""
-    records: List[Dict] = []
-    for row in df.to_dict(orient="records"):
-        ts = row.get("timestamp")
-        ts_num: Optional[int] = None
-        if hasattr(ts, "timestamp"):
-            ts_num = int(ts.timestamp() * 1000)
-        else:
-            try:
-                ts_num = int(pd.to_datetime(ts).timestamp() * 1000)
-            except Exception:  # noqa: BLE001
-                ts_num = None
-        if ts_num is None:
-            continue
-        rec: Dict = {"ts": ts_num, "price": float(row.get("price", 0))}
-        blk = row.get("block")
-        if blk is not None and not (isinstance(blk, float) and math.isnan(blk)):
-            try:
-                rec["block"] = int(blk)
-            except Exception:  # noqa: BLE001
-                pass
-        records.append(rec)
+    if df.empty:
+        return []
+    ts_series = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
+    ts_ms = (ts_series.astype("datetime64[ns, UTC]").astype("int64") // 1_000_000).to_numpy()
+    valid = ts_series.notna().to_numpy()
+    price_arr = df["price"].to_numpy(dtype=float)
+    records: List[Dict] = [
+        {"ts": int(ts), "price": float(price)}
+        for ts, price, ok in zip(ts_ms, price_arr, valid)
+        if ok
+    ]
+    if valid.all():
+        _splice_block_column(records, df)
+    else:
+        _splice_block_column(records, df[valid])
     return records
 
 
@@ -615,7 +1093,9 @@ def _worker_base_url() -> Optional[str]:
 
 
 def _post_worker(url: str, payload: Dict, timeout: int = 15) -> None:
-    resp = requests.post(url, json=payload, timeout=timeout)
+    # Lewat session keep-alive yang sama dengan RPC: beberapa POST ingest
+    # berurutan memakai ulang satu koneksi TLS ke Worker.
+    resp = _RPC_SESSION.post(url, json=payload, timeout=timeout)
     resp.raise_for_status()
 
 
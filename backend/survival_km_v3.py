@@ -1,13 +1,40 @@
 import argparse
+import csv
 import math
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 import requests
-from lifelines import KaplanMeierFitter
+from requests.adapters import HTTPAdapter
+
+# pyarrow opsional: cache harga disimpan parquet (baca/tulis kolumnar, jauh
+# lebih cepat dari parse JSON); tanpa pyarrow tetap jatuh ke format JSON lama.
+try:
+    import pyarrow  # noqa: F401
+
+    HAS_PYARROW = True
+except ImportError:  # pragma: no cover - tergantung environment
+    HAS_PYARROW = False
+
+# orjson opsional: encode payload ingest (bisa ribuan baris harga) di C,
+# sekitar 10x throughput json stdlib. Tanpa orjson jatuh ke stdlib.
+try:
+    import orjson
+
+    def _json_dumps(body: Dict) -> bytes:
+        return orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY)
+
+except ImportError:  # pragma: no cover - tergantung environment
+    import json as _json
+
+    def _json_dumps(body: Dict) -> bytes:
+        # allow_nan=False: NaN yang lolos sanitasi gagal keras di sini, bukan
+        # menjadi literal NaN yang baru meledak saat di-parse Worker/frontend.
+        return _json.dumps(body, allow_nan=False).encode("utf-8")
 
 # Konfigurasi sumber data via RPC (default Base).
 RPC_URL = os.getenv("AERODROME_RPC_URL", "https://mainnet.base.org").strip()
@@ -30,6 +57,13 @@ SAMPLE_INTERVAL_SEC = int(os.getenv("SAMPLE_INTERVAL_SEC", "600"))
 BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", "5"))  # Smaller batches
 BATCH_SLEEP = float(os.getenv("RPC_BATCH_SLEEP", "2.0"))  # Longer sleep between batches
 RPC_CALL_DELAY = float(os.getenv("RPC_CALL_DELAY", "0.3"))  # Delay between individual RPC calls
+# Banyak RPC publik membatasi jumlah entry per batch JSON-RPC; 10 aman untuk Base.
+RPC_BATCH_MAX = int(os.getenv("RPC_BATCH_MAX", "10"))
+# Jumlah batch POST yang boleh in-flight bersamaan (pool Session menampung 32).
+RPC_MAX_CONCURRENCY = int(os.getenv("RPC_MAX_CONCURRENCY", "4"))
+# Satu dari berapa target yang diverifikasi via RPC sebagai anchor; sisanya
+# diinterpolasi (block time Base nyaris konstan).
+BLOCK_ANCHOR_STRIDE = int(os.getenv("BLOCK_ANCHOR_STRIDE", "16"))
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CACHE_PREFIX_ENV = os.getenv("CACHE_PREFIX")
@@ -43,10 +77,28 @@ WORKER_BASE_URL = os.getenv("WORKER_BASE_URL", "").strip()
 WINDOWS = [100, 200, 300, 500]
 HORIZONS = [6, 12, 24, 48]
 
+# Ukuran blok baris untuk scan survival vectorized (menjaga matriks deviasi
+# tetap muat di cache, memori O(blok x n)).
+_SCAN_BLOCK = 1024
+
+# ln(1.0001) dihitung sekali; tick->price memakai exp(tick * ln_base) yang
+# lebih murah dari pow(1.0001, tick) per scalar.
+_LOG_TICK_BASE = math.log(1.0001)
+_INV_LOG_TICK_BASE = 1.0 / _LOG_TICK_BASE
+
 BLOCK_CACHE: Dict[int, Dict] = {}
 SLOT0_CACHE: Dict[int, int] = {}
 DECIMALS_CACHE: Dict[str, Tuple[int, int]] = {}
 
+# Semua traffic HTTP lewat satu Session: koneksi ke RPC/Worker di-keep-alive,
+# jadi tidak bayar TCP+TLS handshake per call. Retry tetap ditangani manual di
+# rpc_call (max_retries=0 di adapter supaya tidak dobel retry).
+_RPC_SESSION = requests.Session()
+_RPC_ADAPTER = HTTPAdapter(pool_connections=1, pool_maxsize=32, max_retries=0)
+_RPC_SESSION.mount("https://", _RPC_ADAPTER)
+_RPC_SESSION.mount("http://", _RPC_ADAPTER)
+_RPC_SESSION.headers["Connection"] = "keep-alive"
+
 
 def rpc_call(method: str, params: List, max_retries: int = 8) -> Dict:
     """Make RPC call with exponential backoff for rate limiting."""
@@ -63,7 +115,7 @@ def rpc_call(method: str, params: List, max_retries: int = 8) -> Dict:
                 print(f"[RPC] Rate limited, waiting {backoff}s before retry {attempt}/{max_retries}...")
                 time.sleep(backoff)
             
-            resp = requests.post(RPC_URL, headers=headers, json=payload, timeout=30)
+            resp = _RPC_SESSION.post(RPC_URL, headers=headers, json=payload, timeout=30)
             resp.raise_for_status()
             data = resp.json()
             if "error" in data:
@@ -93,10 +145,97 @@ def rpc_call(method: str, params: List, max_retries: int = 8) -> Dict:
     raise RuntimeError(f"RPC call failed after {max_retries} retries: {last_error}")
 
 
+def rpc_batch_call(calls: List[Tuple[str, List]], max_retries: int = 8) -> List:
+    """Kirim beberapa call JSON-RPC sekaligus sebagai satu array batch (satu POST).
+
+    Hasil dikembalikan searah dengan `calls`; entry yang gagal jadi None.
+    """
+    if not calls:
+        return []
+    headers = {"Content-Type": "application/json", "Accept": "application/json"}
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    last_error = None
+
+    for attempt in range(1, max_retries + 1):
+        try:
+            if attempt > 1:
+                backoff = min(2 ** attempt, 120)
+                print(f"[RPC] Rate limited, waiting {backoff}s before batch retry {attempt}/{max_retries}...")
+                time.sleep(backoff)
+
+            resp = _RPC_SESSION.post(RPC_URL, headers=headers, json=payload, timeout=60)
+            resp.raise_for_status()
+            data = resp.json()
+            if isinstance(data, dict):
+                # Node menolak seluruh batch (mis. melebihi limit) -> satu objek error.
+                raise RuntimeError(data.get("error", data))
+
+            time.sleep(RPC_CALL_DELAY)
+            results: List = [None] * len(calls)
+            for entry in data:
+                idx = entry.get("id")
+                if isinstance(idx, int) and 0 <= idx < len(calls) and "error" not in entry:
+                    results[idx] = entry.get("result")
+            return results
+
+        except requests.HTTPError as exc:
+            last_error = exc
+            status = getattr(exc.response, "status_code", None)
+            if status == 429 and attempt < max_retries:
+                continue
+            if status == 429:
+                print(f"[RPC] Rate limit exceeded after {max_retries} batch retries")
+            raise
+
+        except Exception as exc:  # noqa: BLE001
+            last_error = exc
+            if attempt >= max_retries:
+                break
+            time.sleep(min(2 ** attempt, 60))
+
+    raise RuntimeError(f"Batch RPC call failed after {max_retries} retries: {last_error}")
+
+
+def _rpc_batch_call_many(groups: List[List[Tuple[str, List]]]) -> List[List]:
+    """Kirim beberapa batch JSON-RPC paralel dalam gelombang RPC_MAX_CONCURRENCY.
+
+    pool.map menjaga urutan hasil == urutan groups. BATCH_SLEEP hanya dibayar
+    antar gelombang, bukan antar batch, jadi throttle total tetap konservatif
+    sementara latensi network di-overlap.
+    """
+    if not groups:
+        return []
+    if len(groups) == 1:
+        return [rpc_batch_call(groups[0])]
+    results: List[List] = []
+    with ThreadPoolExecutor(max_workers=RPC_MAX_CONCURRENCY) as pool:
+        for start in range(0, len(groups), RPC_MAX_CONCURRENCY):
+            wave = groups[start : start + RPC_MAX_CONCURRENCY]
+            if start > 0:
+                time.sleep(BATCH_SLEEP)
+            results.extend(pool.map(rpc_batch_call, wave))
+    return results
+
+
 def _hex_to_int(h: str) -> int:
+    # Quantity RPC (block number/timestamp) panjangnya variabel; tetap lewat
+    # int(str, 16) karena fromhex menuntut jumlah digit genap.
     return int(h, 16)
 
 
+def _word_to_int(h: str) -> int:
+    """Parse satu word ABI 32-byte (64 digit hex) ke int.
+
+    bytes.fromhex + int.from_bytes melewati parser string umum int(str, 16);
+    untuk word fixed-width ini kira-kira dua kali lebih cepat.
+    """
+    word = h[2:66] if h.startswith("0x") else h[:64]
+    return int.from_bytes(bytes.fromhex(word), "big")
+
+
 def _call_eth_call(to: str, data: str, block: str = "latest") -> Optional[str]:
     params = [{"to": to, "data": data}, block]
     res = rpc_call("eth_call", params)
@@ -145,6 +284,77 @@ def find_block_for_timestamp(target_ts: int, latest_num: int, latest_ts: int) ->
     return guess
 
 
+def _fetch_block_timestamps(block_nums: List[int]) -> List[Optional[int]]:
+    """Ambil timestamp banyak block sekaligus, chunk per RPC_BATCH_MAX."""
+    out: List[Optional[int]] = [None] * len(block_nums)
+    pending: List[Tuple[int, int]] = []
+    for i, num in enumerate(block_nums):
+        blk = BLOCK_CACHE.get(num)
+        if blk is not None:
+            out[i] = _hex_to_int(blk["timestamp"])
+        else:
+            pending.append((i, num))
+    chunks = [pending[s : s + RPC_BATCH_MAX] for s in range(0, len(pending), RPC_BATCH_MAX)]
+    groups = [
+        [("eth_getBlockByNumber", [hex(num), False]) for _, num in chunk]
+        for chunk in chunks
+    ]
+    # Cache diisi di thread koordinator saja, worker hanya mengirim HTTP.
+    for chunk, results in zip(chunks, _rpc_batch_call_many(groups)):
+        for (i, num), blk in zip(chunk, results):
+            if blk:
+                BLOCK_CACHE[num] = blk
+                out[i] = _hex_to_int(blk["timestamp"])
+    return out
+
+
+def resolve_blocks_for_timestamps(
+    targets: List[int], latest_num: int, latest_ts: int
+) -> List[int]:
+    """Resolve nomor block untuk banyak target timestamp dengan anchor + interpolasi.
+
+    Block timestamp monotonic dan nyaris linear, jadi cukup verifikasi satu
+    anchor tiap BLOCK_ANCHOR_STRIDE target via RPC (tebakan linear + maksimal
+    dua ronde koreksi batched, toleransi 30 detik); target di antaranya
+    diinterpolasi dari anchor tanpa RPC sama sekali.
+    """
+    m = len(targets)
+    if m == 0:
+        return []
+    anchor_pos = list(range(0, m, BLOCK_ANCHOR_STRIDE))
+    if anchor_pos[-1] != m - 1:
+        anchor_pos.append(m - 1)
+    guesses = [
+        max(0, int(latest_num - (latest_ts - targets[i]) / BASE_BLOCK_TIME_SEC))
+        for i in anchor_pos
+    ]
+    unresolved = list(range(len(anchor_pos)))
+    for _ in range(3):
+        if not unresolved:
+            break
+        ts_list = _fetch_block_timestamps([guesses[k] for k in unresolved])
+        still: List[int] = []
+        for k, blk_ts in zip(unresolved, ts_list):
+            if blk_ts is None:
+                continue
+            diff = blk_ts - targets[anchor_pos[k]]
+            if abs(diff) <= 30:
+                continue
+            adjust = int(diff / BASE_BLOCK_TIME_SEC)
+            if adjust == 0:
+                adjust = 1 if diff > 0 else -1
+            guesses[k] = max(0, guesses[k] - adjust)
+            still.append(k)
+        unresolved = still
+
+    t_arr = np.asarray(targets, dtype=np.float64)
+    blocks = np.rint(np.interp(t_arr, t_arr[anchor_pos], np.asarray(guesses, dtype=np.float64)))
+    blocks = np.maximum(blocks, 0).astype(np.int64)
+    # Posisi anchor memakai hasil verifikasi persis, bukan hasil pembulatan.
+    blocks[anchor_pos] = guesses
+    return blocks.tolist()
+
+
 def call_slot0(pair: str, block_num: int) -> Optional[int]:
     """Ambil sqrtPriceX96 dari slot0 (pool V3/CL)."""
     if block_num in SLOT0_CACHE:
@@ -161,13 +371,43 @@ def call_slot0(pair: str, block_num: int) -> Optional[int]:
     if not res or res == "0x":
         return None
     try:
-        sqrt_price_x96 = int(res[2:66], 16)
+        sqrt_price_x96 = _word_to_int(res)
         SLOT0_CACHE[block_num] = sqrt_price_x96
         return sqrt_price_x96
     except Exception:  # noqa: BLE001
         return None
 
 
+def call_slot0_batch(pair: str, block_nums: List[int]) -> Dict[int, int]:
+    """Ambil sqrtPriceX96 untuk banyak block via batch eth_call slot0."""
+    out: Dict[int, int] = {}
+    misses: List[int] = []
+    seen: set = set()
+    for num in block_nums:
+        if num in SLOT0_CACHE:
+            out[num] = SLOT0_CACHE[num]
+        elif num not in seen:
+            seen.add(num)
+            misses.append(num)
+    data = "0x3850c7bd"  # slot0()
+    chunks = [misses[s : s + RPC_BATCH_MAX] for s in range(0, len(misses), RPC_BATCH_MAX)]
+    groups = [
+        [("eth_call", [{"to": pair, "data": data}, hex(num)]) for num in chunk]
+        for chunk in chunks
+    ]
+    for chunk, results in zip(chunks, _rpc_batch_call_many(groups)):
+        for num, res in zip(chunk, results):
+            if not res or res == "0x":
+                continue
+            try:
+                sqrt_price_x96 = _word_to_int(res)
+            except Exception:  # noqa: BLE001
+                continue
+            SLOT0_CACHE[num] = sqrt_price_x96
+            out[num] = sqrt_price_x96
+    return out
+
+
 def ensure_cache_dir() -> None:
     os.makedirs(CACHE_DIR, exist_ok=True)
 
@@ -182,7 +422,8 @@ def cache_prefix_for_pair(pair_address: str) -> str:
 def cache_filepath(pair_address: str, lookback_hours: int, sample_interval_sec: int) -> str:
     ensure_cache_dir()
     prefix = cache_prefix_for_pair(pair_address)
-    filename = f"{prefix}_v3_LOOKBACK{lookback_hours}_INTERVAL{sample_interval_sec}.json"
+    ext = "parquet" if HAS_PYARROW else "json"
+    filename = f"{prefix}_v3_LOOKBACK{lookback_hours}_INTERVAL{sample_interval_sec}.{ext}"
     return os.path.join(CACHE_DIR, filename)
 
 
@@ -216,7 +457,7 @@ def get_token_decimals(token_address: str) -> Optional[int]:
     if not data or len(data) < 66:
         return None
     try:
-        return int(data[2:66], 16)
+        return _word_to_int(data)
     except Exception:  # noqa: BLE001
         return None
 
@@ -251,30 +492,73 @@ def resolve_decimals(pair_address: str) -> Tuple[int, int]:
     return dec0, dec1
 
 
-def load_cached_prices(path: str, start_ts: int, end_ts: int) -> pd.DataFrame:
-    if not os.path.exists(path):
-        return pd.DataFrame()
+def _read_json_cache(path: str) -> pd.DataFrame:
+    """Baca cache format JSON lama (payload {meta, data} dari pd.Series.to_json)."""
     try:
         loaded = pd.read_json(path)
         if isinstance(loaded, pd.DataFrame) and "timestamp" in loaded.columns:
-            df = loaded
-        else:
-            df = pd.DataFrame(loaded.get("data", []))  # type: ignore[arg-type]
+            return loaded
+        return pd.DataFrame(loaded.get("data", []))  # type: ignore[arg-type]
     except ValueError:
-        return pd.DataFrame()
+        # Blob {meta, data} tidak valid sebagai frame; coba parse sebagai series
+        # lalu ambil field data-nya.
+        try:
+            loaded = pd.read_json(path, typ="series")
+        except ValueError:
+            return pd.DataFrame()
+        return pd.DataFrame(loaded.get("data", []))
+
+
+def _read_cache_frame(path: str) -> pd.DataFrame:
+    if os.path.exists(path):
+        if path.endswith(".parquet"):
+            try:
+                return pd.read_parquet(path)
+            except (OSError, ValueError):
+                return pd.DataFrame()
+        return _read_json_cache(path)
+    if path.endswith(".parquet"):
+        # Migrasi sekali jalan: cache .json dari versi lama dibaca lalu ditulis
+        # ulang sebagai parquet di path baru.
+        legacy = path[: -len("parquet")] + "json"
+        if os.path.exists(legacy):
+            df = _read_json_cache(legacy)
+            if not df.empty:
+                try:
+                    df.to_parquet(path, engine="pyarrow", compression="zstd")
+                    print(f"Migrated legacy JSON cache to parquet: {path}")
+                except (OSError, ValueError):
+                    pass
+            return df
+    return pd.DataFrame()
+
+
+def load_cached_prices(path: str, start_ts: int, end_ts: int) -> pd.DataFrame:
+    df = _read_cache_frame(path)
     if df.empty:
         return df
-    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    if not pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
     start_dt = pd.to_datetime(start_ts, unit="s", utc=True)
     end_dt = pd.to_datetime(end_ts, unit="s", utc=True)
     df = df[(df["timestamp"] >= start_dt) & (df["timestamp"] <= end_dt)]
-    df = df.sort_values("timestamp").reset_index(drop=True)
+    # Cache ditulis terurut; sort hanya kalau memang acak.
+    if not df["timestamp"].is_monotonic_increasing:
+        df = df.sort_values("timestamp", ignore_index=True)
+    else:
+        df = df.reset_index(drop=True)
     return df
 
 
 def save_cached_prices(df: pd.DataFrame, path: str) -> None:
     ensure_cache_dir()
-    payload = {"meta": build_meta(PAIR_ADDRESS), "data": df.to_dict(orient="records")}
+    if HAS_PYARROW and path.endswith(".parquet"):
+        try:
+            df.to_parquet(path, engine="pyarrow", compression="zstd")
+            return
+        except (OSError, ValueError):
+            pass  # jatuh ke penulis JSON lama
+    payload = {"meta": build_meta(PAIR_ADDRESS), "data": _serialize_prices(df)}
     pd.Series(payload).to_json(path, date_format="iso")
 
 
@@ -311,7 +595,7 @@ def get_price_data(
     if worker_base_url:
         try:
             pair_for_last = pair_label if pair_label else cache_prefix_for_pair(pair_address)
-            resp = requests.get(
+            resp = _RPC_SESSION.get(
                 f"{worker_base_url.rstrip('/')}/last_ts",
                 params={"pair": pair_for_last},
                 timeout=10,
@@ -325,7 +609,6 @@ def get_price_data(
             print(f"Warning: failed to fetch last_ts from Worker: {exc}")
 
     latest_num, latest_ts = get_latest_block()
-    records: List[Dict] = []
     now = latest_ts
     start_ts = now - lookback_hours * 3600
     if last_ts_sec and last_ts_sec < now:
@@ -341,41 +624,71 @@ def get_price_data(
     if not cached_df.empty:
         print(f"Using cached history to minimize RPC calls ({len(cached_df)} rows)")
 
-    call_counter = 0
-    existing_ts: set[int] = set()
+    # Kumpulkan semua target sebagai satu arange lalu buang yang sudah ada di
+    # cache dengan np.isin -- tanpa loop Python dan tanpa .timestamp() per
+    # baris. Block search dan slot0 kemudian berjalan batched seperti biasa.
+    all_targets = np.arange(target_ts, now + 1, sample_interval_sec, dtype=np.int64)
     if not cached_df.empty:
-        existing_ts = {int(ts.timestamp()) for ts in cached_df["timestamp"]}
-
-    while target_ts <= now:
-        if target_ts in existing_ts:
-            target_ts += sample_interval_sec
-            continue
-        blk_num = find_block_for_timestamp(target_ts, latest_num, latest_ts)
-        sqrt_price_x96 = call_slot0(pair_address, blk_num)
-        if sqrt_price_x96:
-            price = (sqrt_price_x96 ** 2) / (2 ** 192) * (10 ** (dec0 - dec1))
-            if invert_flag and price:
-                price = 1 / price
-            records.append(
-                {
-                    "timestamp": pd.to_datetime(target_ts, unit="s", utc=True),
-                    "price": price,
-                    "block": blk_num,
-                }
+        cached_sec = cached_df["timestamp"].astype("int64").to_numpy() // 1_000_000_000
+        all_targets = all_targets[~np.isin(all_targets, cached_sec)]
+    targets: List[int] = all_targets.tolist()
+
+    # Buffer gabungan dialokasikan sekali seukuran cache + target: bagian cache
+    # disalin ke kepala, sampel baru mengisi ekor, dan frame akhir membungkus
+    # slice-nya tanpa melewati pd.concat (yang menyalin + retype semua kolom).
+    n_cached = len(cached_df)
+    total_max = n_cached + len(targets)
+    ts_buf = np.empty(total_max, dtype=np.int64)  # epoch ns
+    price_buf = np.empty(total_max, dtype=np.float64)
+    block_buf = np.full(total_max, np.nan, dtype=np.float64)
+    if n_cached:
+        ts_buf[:n_cached] = cached_df["timestamp"].astype("int64").to_numpy()
+        price_buf[:n_cached] = cached_df["price"].to_numpy(dtype=np.float64)
+        if "block" in cached_df.columns:
+            block_buf[:n_cached] = pd.to_numeric(
+                cached_df["block"], errors="coerce"
+            ).to_numpy(dtype=np.float64)
+
+    k = n_cached
+    if targets:
+        block_nums = resolve_blocks_for_timestamps(targets, latest_num, latest_ts)
+        sqrt_by_block = call_slot0_batch(pair_address, block_nums)
+        # Loop hanya menyimpan sqrtPriceX96 mentah; aritmetika harga menyusul
+        # vectorized.
+        sqrt_buf = np.empty(len(targets), dtype=np.float64)
+        j = 0
+        for t, blk_num in zip(targets, block_nums):
+            sqrt_price_x96 = sqrt_by_block.get(blk_num)
+            if not sqrt_price_x96:
+                continue
+            ts_buf[k] = t * 1_000_000_000
+            sqrt_buf[j] = sqrt_price_x96
+            block_buf[k] = blk_num
+            k += 1
+            j += 1
+        if j:
+            # price = (sqrtPriceX96^2 / 2^192) * 10^(dec0-dec1), dihitung di
+            # log2-space untuk semua sampel sekaligus; pembalikan harga cukup
+            # di satu titik ini.
+            log2_price = (
+                2.0 * np.log2(sqrt_buf[:j]) - 192.0 + (dec0 - dec1) * math.log2(10.0)
             )
-        call_counter += 1
-        if BATCH_SIZE > 0 and call_counter % BATCH_SIZE == 0:
-            time.sleep(BATCH_SLEEP)
-        target_ts += sample_interval_sec
-
-    df_parts = []
-    if not cached_df.empty:
-        df_parts.append(cached_df)
-    if records:
-        df_parts.append(pd.DataFrame(records))
+            price_arr = np.exp2(log2_price)
+            if invert_flag:
+                price_arr = 1.0 / price_arr
+            price_buf[n_cached:k] = price_arr
+
+    if k:
+        df = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(ts_buf[:k], utc=True),
+                "price": price_buf[:k],
+                "block": block_buf[:k],
+            }
+        )
+    else:
+        df = pd.DataFrame()
 
-    df = pd.concat(df_parts, ignore_index=True) if df_parts else pd.DataFrame()
-    
     # Ensure we have the required columns
     if not df.empty and "timestamp" not in df.columns:
         print(f"[ERROR] DataFrame missing 'timestamp' column. Available columns: {list(df.columns)}")
@@ -383,8 +696,13 @@ def get_price_data(
     
     df = df.dropna()
     if not df.empty:
-        df = df.sort_values("timestamp").reset_index(drop=True)
-    
+        # Bagian cache dan bagian baru masing-masing sudah terurut; concat
+        # dua segmen biasanya tetap monotonic sehingga sort bisa dilewati.
+        if not df["timestamp"].is_monotonic_increasing:
+            df = df.sort_values("timestamp", ignore_index=True)
+        else:
+            df = df.reset_index(drop=True)
+
     if df.empty:
         raise RuntimeError("Tidak ada data harga yang berhasil diambil dari RPC.")
     
@@ -399,68 +717,206 @@ def get_price_data(
 def compute_ticks(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     df = df[df["price"] > 0].reset_index(drop=True)
-    df["log_price"] = np.log(df["price"])
-    df["tick"] = np.floor(df["log_price"] / math.log(1.0001)).astype(int)
+    prices = df["price"].to_numpy(dtype=np.float64)
+    log_price = np.log(prices)
+    tick = np.floor(log_price * _INV_LOG_TICK_BASE).astype(np.int64)
+    # Koreksi satu langkah ala TickMath.getTickAtSqrtRatio: re-encode tick ke
+    # harga dan geser bila pembulatan float menaruh harga di luar bracket
+    # [1.0001^tick, 1.0001^(tick+1)), menghapus off-by-one di batas tick.
+    tick[np.exp((tick + 1) * _LOG_TICK_BASE) <= prices] += 1
+    tick[np.exp(tick * _LOG_TICK_BASE) > prices] -= 1
+    df["log_price"] = log_price
+    df["tick"] = tick
     return df
 
 
-def compute_survival(df: pd.DataFrame, W: int, horizon_hours: int) -> Optional[Dict]:
-    if df.empty:
-        return None
+# Kernel numba di-resolve sekali saat pertama dibutuhkan; False = numba absen.
+_SCAN_KERNEL = None
+
 
-    timestamps = df["timestamp"].to_numpy()
+def _resolve_scan_kernel():
+    global _SCAN_KERNEL
+    if _SCAN_KERNEL is not None:
+        return _SCAN_KERNEL
+    try:
+        from numba import njit, prange
+
+        @njit(cache=True, boundscheck=False, parallel=True)
+        def _scan(ticks, limit_idx, W):  # pragma: no cover - butuh numba
+            n = ticks.shape[0]
+            out = np.full(n, -1, dtype=np.int64)
+            for i in prange(n):
+                center = ticks[i]
+                stop = limit_idx[i]
+                for j in range(i + 1, stop):
+                    dev = ticks[j] - center
+                    if dev > W or dev < -W:
+                        out[i] = j
+                        break
+            return out
+
+        _SCAN_KERNEL = _scan
+    except ImportError:  # pragma: no cover - tergantung environment
+        _SCAN_KERNEL = False
+    return _SCAN_KERNEL
+
+
+def _scan_exits(
+    ticks: np.ndarray, limit_idx: np.ndarray, windows: List[int]
+) -> Dict[int, np.ndarray]:
+    """Indeks exit pertama per baris untuk semua window sekaligus.
+
+    Exit baris i untuk window W = j > i pertama dengan |tick_j - tick_i| > W,
+    dicari sampai limit_idx[i] (exclusive). Jalur utama: kernel numba dengan
+    early-exit per baris. Fallback tanpa numba: matriks |deviasi| dan mask
+    in-window dibangun sekali per blok _SCAN_BLOCK baris lalu dipakai ulang
+    untuk tiap W, jadi biaya O(n^2) per blok dibayar sekali per horizon,
+    bukan sekali per (W, horizon).
+    """
+    n = ticks.shape[0]
+    # Rentang tick global membatasi deviasi maksimum yang mungkin; window yang
+    # >= rentang itu tidak akan pernah menghasilkan exit, jadi scan-nya
+    # dilewati sama sekali.
+    span = int(ticks.max() - ticks.min()) if n else 0
+    exit_idx = {W: np.full(n, -1, dtype=np.int64) for W in windows}
+    active = [W for W in windows if W < span]
+    if not active:
+        return exit_idx
+
+    kernel = _resolve_scan_kernel()
+    if kernel:
+        ticks64 = np.ascontiguousarray(ticks, dtype=np.int64)
+        limit64 = np.ascontiguousarray(limit_idx, dtype=np.int64)
+        for W in active:
+            exit_idx[W] = kernel(ticks64, limit64, W)
+        return exit_idx
+
+    col = np.arange(n, dtype=np.int64)[None, :]
+    for start in range(0, n, _SCAN_BLOCK):
+        stop = min(start + _SCAN_BLOCK, n)
+        rows = np.arange(start, stop, dtype=np.int64)
+        in_win = (col > rows[:, None]) & (col < limit_idx[rows][:, None])
+        dev = np.abs(ticks[None, :] - ticks[rows, None])
+        for W in active:
+            hit_mat = (dev > W) & in_win
+            hit = hit_mat.any(axis=1)
+            first = hit_mat.argmax(axis=1)
+            exit_idx[W][np.flatnonzero(hit) + start] = first[hit]
+    return exit_idx
+
+
+def compute_survival_all(
+    df: pd.DataFrame, horizons: List[int], windows: List[int]
+) -> List[Dict]:
+    """Metrik survival untuk semua kombinasi (horizon, window) dari satu scan.
+
+    Exit pertama bersifat prefix-stabil: j out-of-band pertama di dalam
+    horizon terpanjang juga exit pertama untuk horizon lebih pendek selama
+    j masih di dalam batasnya. Jadi scan mahal cukup sekali per window
+    (dengan batas horizon maksimum); tiap horizon tinggal menyaring exit
+    yang jatuh di luar batasnya dengan perbandingan index murah.
+    """
+    if df.empty or not horizons:
+        return []
+
+    # Kolom timestamp dari pipeline sudah datetime64 UTC; langsung view int64
+    # ns tanpa melewati parser pd.to_datetime lagi.
+    ts_series = df["timestamp"]
+    if not pd.api.types.is_datetime64_any_dtype(ts_series):
+        ts_series = pd.to_datetime(ts_series, utc=True)
+    ts_ns = ts_series.astype("int64").to_numpy()
     ticks = df["tick"].to_numpy()
-    prices = df["price"].to_numpy()
-
-    last_time = timestamps[-1]
-    horizon_delta = np.timedelta64(int(horizon_hours * 3600), "s")
-
-    durations: List[float] = []
-    events: List[int] = []
-    full_followup: List[bool] = []
-
-    n = len(df)
-    for i in range(n):
-        t_start = timestamps[i]
-        center_tick = ticks[i]
-        lower = center_tick - W
-        upper = center_tick + W
-        limit_time = t_start + horizon_delta
-
-        has_full = limit_time <= last_time
-        exit_time = limit_time if has_full else last_time
-        event = 0
-
-        j = i + 1
-        while j < n and timestamps[j] <= limit_time:
-            if ticks[j] < lower or ticks[j] > upper:
-                event = 1
-                exit_time = timestamps[j]
-                break
-            j += 1
+    n = ts_ns.shape[0]
+    last_ns = ts_ns[-1]
+
+    max_horizon_ns = int(max(horizons) * 3600) * 1_000_000_000
+    limit_idx_max = np.searchsorted(ts_ns, ts_ns + max_horizon_ns, side="right")
+    exit_by_window = _scan_exits(ticks, limit_idx_max, windows)
+
+    out: List[Dict] = []
+    for horizon_hours in horizons:
+        # side="right" membuat j berjalan selama ts[j] <= limit (inklusif)
+        # seperti loop per-baris yang lama.
+        horizon_ns = int(horizon_hours * 3600) * 1_000_000_000
+        limit_ns = ts_ns + horizon_ns
+        limit_idx = np.searchsorted(ts_ns, limit_ns, side="right")
+        follow_arr = limit_ns <= last_ns
+        censor_ns = np.minimum(limit_ns, last_ns)
+        for W in windows:
+            exit_idx = exit_by_window[W]
+            event_mask = (exit_idx >= 0) & (exit_idx < limit_idx)
+            events_arr = event_mask.astype(int)
+            exit_ns = np.where(event_mask, ts_ns[np.clip(exit_idx, 0, n - 1)], censor_ns)
+            durations_arr = (exit_ns - ts_ns).astype(np.float64) / 3.6e12
+            out.append(
+                _survival_metrics(
+                    durations_arr, events_arr, follow_arr, ticks, W, horizon_hours
+                )
+            )
+    return out
+
+
+def compute_survival_for_horizon(
+    df: pd.DataFrame, horizon_hours: int, windows: List[int]
+) -> List[Dict]:
+    return compute_survival_all(df, [horizon_hours], windows)
+
+
+def compute_survival(df: pd.DataFrame, W: int, horizon_hours: int) -> Optional[Dict]:
+    rows = compute_survival_for_horizon(df, horizon_hours, [W])
+    return rows[0] if rows else None
+
 
-        duration_hours = (exit_time - t_start) / np.timedelta64(1, "h")
-        durations.append(float(duration_hours))
-        events.append(int(event))
-        full_followup.append(has_full)
-
-    durations_arr = np.array(durations, dtype=float)
-    events_arr = np.array(events, dtype=int)
-    follow_arr = np.array(full_followup, dtype=bool)
-
-    kmf = KaplanMeierFitter()
-    kmf.fit(durations_arr, event_observed=events_arr)
-    km_surv = float(kmf.predict(horizon_hours))
-
-    ci_table = kmf.confidence_interval_
-    ci_at = (
-        ci_table.reindex(ci_table.index.union([horizon_hours]))
-        .sort_index()
-        .ffill()
-        .loc[horizon_hours]
+# z untuk CI 95% (sama dengan default alpha=0.05 lifelines).
+_KM_Z = 1.959963984540054
+
+
+def _km_estimate(
+    durations_arr: np.ndarray, events_arr: np.ndarray, horizon_hours: float
+) -> Tuple[float, float, float]:
+    """Kaplan-Meier plus CI exponential-Greenwood murni NumPy.
+
+    Setara numerik dengan jalur KaplanMeierFitter.fit/predict/
+    confidence_interval_ dari lifelines, tetapi hanya butuh satu argsort dan
+    beberapa searchsorted -- tidak ada event table pandas per kombinasi.
+    """
+    order = np.argsort(durations_arr, kind="stable")
+    durs = durations_arr[order]
+    evs = events_arr[order].astype(bool)
+    ev_durs = durs[evs]
+    event_times = np.unique(ev_durs)
+    if event_times.size == 0:
+        return 1.0, 1.0, 1.0
+    n_at_risk = len(durs) - np.searchsorted(durs, event_times, side="left")
+    deaths = (
+        np.searchsorted(ev_durs, event_times, side="right")
+        - np.searchsorted(ev_durs, event_times, side="left")
     )
-    ci_low = float(ci_at.iloc[0])
-    ci_high = float(ci_at.iloc[1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        surv = np.cumprod(1.0 - deaths / n_at_risk)
+        greenwood = np.cumsum(deaths / (n_at_risk * (n_at_risk - deaths).astype(np.float64)))
+        log_surv = np.log(surv)
+        theta = _KM_Z * np.sqrt(greenwood) / log_surv
+        ci_low = np.exp(-np.exp(np.log(-log_surv) - theta))
+        ci_high = np.exp(-np.exp(np.log(-log_surv) + theta))
+    # S=0 / S=1 membuat log-log tak terdefinisi; CI menempel ke estimatnya.
+    ci_low = np.where(surv == 0, 0.0, np.where(surv == 1, 1.0, ci_low))
+    ci_high = np.where(surv == 0, 0.0, np.where(surv == 1, 1.0, ci_high))
+    pos = int(np.searchsorted(event_times, horizon_hours, side="right")) - 1
+    if pos < 0:
+        return 1.0, 1.0, 1.0
+    return float(surv[pos]), float(ci_low[pos]), float(ci_high[pos])
+
+
+def _survival_metrics(
+    durations_arr: np.ndarray,
+    events_arr: np.ndarray,
+    follow_arr: np.ndarray,
+    ticks: np.ndarray,
+    W: int,
+    horizon_hours: int,
+) -> Dict:
+    km_surv, ci_low, ci_high = _km_estimate(durations_arr, events_arr, horizon_hours)
 
     count_total = len(durations_arr)
     count_full = int(follow_arr.sum())
@@ -470,9 +926,9 @@ def compute_survival(df: pd.DataFrame, W: int, horizon_hours: int) -> Optional[D
     center_tick = int(np.median(ticks))
     tick_from = center_tick - W
     tick_to = center_tick + W
-    price_from = float(np.power(1.0001, tick_from))
-    price_to = float(np.power(1.0001, tick_to))
-    price_center = float(np.power(1.0001, center_tick))
+    price_from = math.exp(tick_from * _LOG_TICK_BASE)
+    price_to = math.exp(tick_to * _LOG_TICK_BASE)
+    price_center = math.exp(center_tick * _LOG_TICK_BASE)
     percent_range_total = (price_to - price_from) / price_center * 100
 
     return {
@@ -494,11 +950,8 @@ def compute_survival(df: pd.DataFrame, W: int, horizon_hours: int) -> Optional[D
 
 def generate_recommendation(df: pd.DataFrame) -> pd.DataFrame:
     rows: List[Dict] = []
-    for horizon in HORIZONS:
-        for window in WINDOWS:
-            metrics = compute_survival(df, window, horizon)
-            if not metrics:
-                continue
+    for metrics in compute_survival_all(df, HORIZONS, WINDOWS):
+        if metrics:
             accepted = (
                 metrics["km_surv"] >= 0.6
                 and metrics["count_total"] >= 200
@@ -550,63 +1003,96 @@ def print_recommendations(df: pd.DataFrame) -> None:
         print(f"    percent_range_total: {row['percent_range_total']:.5f}%\n")
 
 
+def _frame_records(df: pd.DataFrame) -> List[Dict]:
+    """Bangun list record dari kolom, bukan to_dict('records') per baris.
+
+    to_numpy().tolist() mengubah tiap kolom ke scalar Python native sekali
+    jalan di C; zip antar kolom tinggal merangkai dict per baris. NaN
+    disubstitusi None (JSON null) hanya pada kolom yang memang punya NaN --
+    json stdlib menulis NaN sebagai literal yang ditolak JSON.parse.
+    """
+    if df.empty:
+        return []
+    columns = list(df.columns)
+    data = {col: df[col].to_numpy().tolist() for col in columns}
+    for col in df.columns[df.isna().any()]:
+        data[col] = [None if pd.isna(value) else value for value in data[col]]
+    return [dict(zip(columns, vals)) for vals in zip(*(data[col] for col in columns))]
+
+
+def save_recommendations_csv(df: pd.DataFrame, path: str) -> None:
+    """Tulis CSV rekomendasi via csv.writer, tanpa mesin formatting to_csv.
+
+    16 baris rekomendasi tidak butuh fitur to_csv; itertuples + writerow
+    menghindari overhead konstruksi formatter pandas per run. NaN ditulis
+    sebagai sel kosong supaya output identik dengan to_csv sebelumnya.
+    """
+    with open(path, "w", newline="") as fh:
+        writer = csv.writer(fh, lineterminator="\n")
+        writer.writerow(df.columns)
+        for row in df.itertuples(index=False, name=None):
+            writer.writerow(
+                ["" if isinstance(v, float) and math.isnan(v) else v for v in row]
+            )
+
+
 def save_recommendations_json(df: pd.DataFrame, path: str) -> Dict:
     ensure_cache_dir()
-    payload = {"meta": build_meta(PAIR_ADDRESS), "data": df.to_dict(orient="records")}
-    pd.Series(payload).to_json(path, date_format="iso")
+    payload = {"meta": build_meta(PAIR_ADDRESS), "data": _frame_records(df)}
+    # Dump payload langsung (orjson bila ada) tanpa round-trip pd.Series.to_json
+    # yang membungkus ulang dict ke Series dan membatasi presisi float ke 10 digit.
+    with open(path, "wb") as fh:
+        fh.write(_json_dumps(payload))
     return payload
 
 
+def _splice_block_column(records: List[Dict], df: pd.DataFrame) -> None:
+    """Tambahkan field block ke records untuk baris dengan block valid (finite)."""
+    if "block" not in df.columns:
+        return
+    blk_arr = pd.to_numeric(df["block"], errors="coerce").to_numpy(dtype=float)
+    for rec, blk in zip(records, blk_arr):
+        if np.isfinite(blk):
+            rec["block"] = int(blk)
+
+
 def _serialize_prices(df: pd.DataFrame) -> List[Dict]:
-    records: List[Dict] = []
-    for row in df.to_dict(orient="records"):
-        ts = row.get("timestamp")
-        if hasattr(ts, "isoformat"):
-            ts_str = ts.isoformat()
-        else:
-            ts_str = str(ts)
-        rec: Dict = {"timestamp": ts_str, "price": float(row.get("price", 0))}
-        blk = row.get("block")
-        if blk is not None and not (isinstance(blk, float) and math.isnan(blk)):
-            try:
-                rec["block"] = int(blk)
-            except Exception:  # noqa: BLE001
-                pass
-        records.append(rec)
+    if df.empty:
+        return []
+    # Satu pass kolom (bukan to_dict per-row + loop kedua).
+    ts_series = df["timestamp"]
+    if pd.api.types.is_datetime64_any_dtype(ts_series):
+        ts_arr = ts_series.dt.strftime("%Y-%m-%dT%H:%M:%S%z").to_numpy()
+    else:
+        ts_arr = ts_series.astype(str).to_numpy()
+    price_arr = df["price"].to_numpy(dtype=float)
+    records: List[Dict] = [
+        {"timestamp": ts, "price": float(price)} for ts, price in zip(ts_arr, price_arr)
+    ]
+    _splice_block_column(records, df)
     return records
 
 
 def _serialize_prices_numeric_ts(df: pd.DataFrame) -> List[Dict]:
     """Serialize price rows with numeric epoch milliseconds for incremental append."""
-    records: List[Dict] = []
     # Check if DataFrame has required columns
     if df.empty or "timestamp" not in df.columns:
         print(f"[WARNING] DataFrame missing timestamp column or empty. Columns: {list(df.columns) if not df.empty else 'empty'}")
-        return records
-    
-    for row in df.to_dict(orient="records"):
-        ts = row.get("timestamp")
-        if ts is None:
-            continue
-            
-        ts_num: Optional[int] = None
-        if hasattr(ts, "timestamp"):
-            ts_num = int(ts.timestamp() * 1000)
-        else:
-            try:
-                ts_num = int(pd.to_datetime(ts).timestamp() * 1000)
-            except Exception:  # noqa: BLE001
-                ts_num = None
-        if ts_num is None:
-            continue
-        rec: Dict = {"ts": ts_num, "price": float(row.get("price", 0))}
-        blk = row.get("block")
-        if blk is not None and not (isinstance(blk, float) and math.isnan(blk)):
-            try:
-                rec["block"] = int(blk)
-            except Exception:  # noqa: BLE001
-                pass
-        records.append(rec)
+        return []
+
+    ts_series = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
+    ts_ms = (ts_series.astype("datetime64[ns, UTC]").astype("int64") // 1_000_000).to_numpy()
+    valid = ts_series.notna().to_numpy()
+    price_arr = df["price"].to_numpy(dtype=float)
+    records: List[Dict] = [
+        {"ts": int(ts), "price": float(price)}
+        for ts, price, ok in zip(ts_ms, price_arr, valid)
+        if ok
+    ]
+    if valid.all():
+        _splice_block_column(records, df)
+    else:
+        _splice_block_column(records, df[valid])
     return records
 
 
@@ -619,7 +1105,14 @@ def _worker_base_url() -> Optional[str]:
 
 
 def _post_worker(url: str, payload: Dict, timeout: int = 15) -> None:
-    resp = requests.post(url, json=payload, timeout=timeout)
+    # Encode sendiri via _json_dumps (orjson bila ada), bukan json= bawaan
+    # requests yang selalu memakai serializer stdlib.
+    resp = _RPC_SESSION.post(
+        url,
+        data=_json_dumps(payload),
+        headers={"Content-Type": "application/json"},
+        timeout=timeout,
+    )
     resp.raise_for_status()
 
 
@@ -634,6 +1127,9 @@ def maybe_ingest_to_worker(
     base_url = _worker_base_url()
     pair_label = PAIR_LABEL or cache_prefix_for_pair(PAIR_ADDRESS)
 
+    # Serialize harga sekali; payload legacy dan /ingest_survival memakai
+    # objek yang sama (dulu _serialize_prices dipanggil dua kali).
+    prices_payload = {"meta": build_meta(PAIR_ADDRESS), "data": _serialize_prices(price_df)}
     body = {
         "pair": pair_label,
         "lookback": lookback_hours,
@@ -641,7 +1137,7 @@ def maybe_ingest_to_worker(
         "generated_at": int(time.time() * 1000),
         "payload": {
             "recommendations": recs_payload,
-            "prices": {"meta": build_meta(PAIR_ADDRESS), "data": _serialize_prices(price_df)},
+            "prices": prices_payload,
         },
     }
     try:
@@ -672,7 +1168,7 @@ def maybe_ingest_to_worker(
           "generated_at": int(time.time() * 1000),
           "payload": {
               "recommendations": recs_payload,
-              "prices": {"meta": build_meta(PAIR_ADDRESS), "data": _serialize_prices(price_df)},
+              "prices": prices_payload,
           },
         }
         _post_worker(f"{base_url}/ingest_survival", survival_payload)
@@ -725,7 +1221,7 @@ def main() -> None:
 
     print("Computing survival and recommendations...")
     recs_df = generate_recommendation(df_ticks)
-    recs_df.to_csv(csv_output, index=False)
+    save_recommendations_csv(recs_df, csv_output)
     recs_payload = save_recommendations_json(recs_df, json_output)
     print(f"Saved recommendations to {csv_output} and {json_output}")
     maybe_ingest_to_worker(recs_payload, raw_df, LOOKBACK_HOURS, SAMPLE_INTERVAL_SEC)